@@ -19,14 +19,19 @@ bl_info = {
 import bpy
 
 from . import (
+    analysis,
     keymaps,
+    ops_analyze,
     ops_paint,
     ops_pose_slider,
     ops_rig,
     ops_symmetry,
+    ops_weights,
     panels,
     preferences,
     properties,
+    weight_history,
+    weights,
 )
 
 
@@ -40,11 +45,21 @@ classes = (
     *ops_paint.classes,
     *ops_rig.classes,
     *ops_symmetry.classes,
+    *ops_weights.classes,
+    *ops_analyze.classes,
     *ops_pose_slider.classes,
     *panels.classes,
 )
 
 
+@bpy.app.handlers.persistent
+def load_post_clear(*args):
+    """Drop per-mesh session state (history, reports, topology) of the file just left."""
+    weights.clear_caches()
+    weight_history.clear()
+    analysis.clear_reports()
+
+
 def register():
     panels.load_tab_icons()
 
@@ -57,6 +72,10 @@ def register():
     bpy.types.Scene.bone_collection_props = bpy.props.PointerProperty(type=properties.BoneCollectionProperties)
     bpy.types.Scene.bone_collection_presets = bpy.props.CollectionProperty(type=properties.BoneCollectionPreset)
     bpy.types.Scene.wpt_smooth = bpy.props.PointerProperty(type=properties.WPT_SmoothSettings)
+    bpy.types.Scene.wpt_layers = bpy.props.PointerProperty(type=properties.WPT_LayerSettings)
+    bpy.types.Scene.wpt_transfer = bpy.props.PointerProperty(type=properties.WPT_TransferSettings)
+    bpy.types.Scene.wpt_analyze = bpy.props.PointerProperty(type=properties.WPT_AnalyzeSettings)
+    bpy.types.Scene.wpt_groups = bpy.props.PointerProperty(type=properties.WPT_GroupSettings)
 
     # WindowManager-level (per-session, not saved with file)
     bpy.types.WindowManager.wpt_auto_follow_active_mesh = bpy.props.BoolProperty(
@@ -71,25 +90,44 @@ def register():
         default='PAINT',
     )
 
+    # Weight history preferences
+    try:
+        prefs = bpy.context.preferences.addons[__package__].preferences
+        weight_history.set_global_undo(prefs.use_global_undo)
+        weight_history.set_budget_mb(prefs.history_budget_mb)
+    except Exception:
+        pass
+
     # Keymaps + auto-follow infrastructure
     keymaps.register_keymaps()
     keymaps.register_msgbus()
     if keymaps.load_post_handler not in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.append(keymaps.load_post_handler)
+    if load_post_clear not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(load_post_clear)
+    if analysis.depsgraph_update_handler not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(analysis.depsgraph_update_handler)
 
 
 def unregister():
     if keymaps.load_post_handler in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.remove(keymaps.load_post_handler)
+    if load_post_clear in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_post_clear)
+    if analysis.depsgraph_update_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(analysis.depsgraph_update_handler)
     keymaps.unregister_msgbus()
     keymaps.unregister_keymaps()
 
     panels.free_tab_icons()
+    weights.clear_caches()
+    weight_history.clear()
+    analysis.clear_reports()
 
     # Scene properties
     for attr in ('pose_slider_props', 'pose_collection',
                  'bone_collection_props', 'bone_collection_presets',
-                 'wpt_smooth'):
+                 'wpt_smooth', 'wpt_layers', 'wpt_transfer', 'wpt_analyze', 'wpt_groups'):
         try:
             delattr(bpy.types.Scene, attr)
         except AttributeError:
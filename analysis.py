@@ -0,0 +1,408 @@
+"""Weight QA analysis: vectorised checks over the bulk weight table.
+
+Reports are plain objects cached per mesh so the panels can show the last
+result without recomputing it on every redraw.
+"""
+
+import bpy
+import numpy as np
+
+from . import bone_weights, weights
+
+# Dense columns built at once while scanning groups.
+GROUP_CHUNK = 32
+
+# mesh.session_uid -> {kind: (generation, report)}
+_reports = {}
+
+# mesh.session_uid -> number of geometry updates (weight edits included) seen.
+_generation = {}
+
+
+def store_report(mesh, kind, report):
+    key = mesh.session_uid
+    _reports.setdefault(key, {})[kind] = (_generation.get(key, 0), report)
+
+
+def get_report(mesh, kind, fresh=False):
+    """Last stored `kind` report for `mesh`, or None if missing or stale.
+
+    A report goes stale when the vertex count changes; with `fresh=True` also
+    as soon as the mesh is edited in any way (weights included) after it was
+    stored.
+    """
+    key = mesh.session_uid
+    generation, report = _reports.get(key, {}).get(kind, (0, None))
+    if report is None or report.n_verts != len(mesh.vertices):
+        return None
+    if fresh and generation != _generation.get(key, 0):
+        return None
+    return report
+
+
+def clear_reports(mesh=None):
+    if mesh is None:
+        _reports.clear()
+        _generation.clear()
+    else:
+        _reports.pop(mesh.session_uid, None)
+
+
+@bpy.app.handlers.persistent
+def depsgraph_update_handler(scene, depsgraph):
+    """Bump the generation of every mesh whose geometry (or weights) changed."""
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        data = update.id.original
+        if isinstance(data, bpy.types.Object):
+            data = data.data if data.type == 'MESH' else None
+        if isinstance(data, bpy.types.Mesh):
+            key = data.session_uid
+            _generation[key] = _generation.get(key, 0) + 1
+
+
+# ===== Spikes and discontinuities =====
+
+class SpikeReport:
+    """Result of find_spikes()."""
+
+    __slots__ = ('n_verts', 'threshold', 'flagged', 'deviation', 'groups')
+
+    def __init__(self, n_verts, threshold, flagged, deviation, groups):
+        self.n_verts = n_verts
+        self.threshold = threshold
+        self.flagged = flagged        # indices of verts over the threshold
+        self.deviation = deviation    # per-vertex largest |w - neighbour mean|
+        self.groups = groups          # [(name, n_spikes, n_breaks, max deviation)], worst first
+
+
+def find_spikes(table, op, edges, threshold, group_indices=None):
+    """Flag verts whose weight in any group deviates from the neighbour mean by more than `threshold`.
+
+    `op` is a row-normalised neighbour operator (weights.smoothing_operator)
+    and `edges` the mesh's (n, 2) edge array. Besides spikes, every edge whose
+    two ends differ by more than `threshold` in a group counts as a break for
+    that group. Groups are scanned a chunk of dense columns at a time.
+    """
+    n = table.n_verts
+    has_nbrs = op.row_sums() > 0.0
+    deviation = np.zeros(n, dtype=np.float32)
+    present = np.unique(table.groups)
+    if group_indices is not None:
+        present = np.intersect1d(present, group_indices)
+    stats = []
+    for start in range(0, len(present), GROUP_CHUNK):
+        cols = present[start:start + GROUP_CHUNK]
+        block = table.dense(cols)
+        dev = np.abs(block - op.dot(block))
+        dev[~has_nbrs] = 0.0
+        np.maximum(deviation, dev.max(axis=1), out=deviation)
+        spikes = (dev > threshold).sum(axis=0)
+        breaks = (np.abs(block[edges[:, 0]] - block[edges[:, 1]]) > threshold).sum(axis=0)
+        worst = dev.max(axis=0)
+        for gi, ns, nb, w in zip(cols.tolist(), spikes.tolist(), breaks.tolist(), worst.tolist()):
+            if ns or nb:
+                stats.append((table.group_names[gi], ns, nb, w))
+    stats.sort(key=lambda s: (s[1], s[2], s[3]), reverse=True)
+    flagged = np.flatnonzero(deviation > threshold)
+    return SpikeReport(n, threshold, flagged, deviation, stats)
+
+
+# ===== Weight leaks =====
+
+class LeakReport:
+    """Result of find_leaks()."""
+
+    __slots__ = ('n_verts', 'distance', 'flagged', 'leaked', 'groups')
+
+    def __init__(self, n_verts, distance, flagged, leaked, groups):
+        self.n_verts = n_verts
+        self.distance = distance
+        self.flagged = flagged        # indices of verts carrying leaked weight
+        self.leaked = leaked          # bool per table entry
+        self.groups = groups          # [(name, n_islands, n_verts, leaked mass)], worst first
+
+
+def find_leaks(table, islands, points, heads, tails, distance):
+    """Find weight that sits too far from its bone.
+
+    `heads` / `tails` are (n_groups, 3) bone segments per table group (NaN
+    rows for groups without a bone, which are skipped) and `points` the
+    vertex positions in the same space. Two kinds of leak are reported per
+    group: whole islands whose closest weighted vertex is farther than
+    `distance` from the bone (a finger weight on a loose earring), and
+    single verts farther than `distance` on islands that do reach the bone
+    (weight bleeding onto the other side of the body).
+    """
+    rows = table.rows()
+    groups = table.groups.astype(np.int64)
+    has_bone = ~np.isnan(heads[:, 0]) if len(heads) else np.zeros(0, dtype=bool)
+    check = np.flatnonzero(has_bone[groups] & (table.weights > weights.WEIGHT_EPS))
+    dist = bone_weights.paired_distances(points[rows[check]], heads[groups[check]], tails[groups[check]])
+
+    # Closest weighted vertex per (group, island).
+    n_islands = int(islands.max(initial=-1)) + 1
+    key = groups[check] * n_islands + islands[rows[check]]
+    uniq, inverse = np.unique(key, return_inverse=True)
+    closest = np.full(len(uniq), np.inf)
+    np.minimum.at(closest, inverse, dist)
+    far_island = closest > distance
+
+    island_leak = far_island[inverse]
+    vert_leak = (dist > distance) & ~island_leak
+    leaked = np.zeros(len(groups), dtype=bool)
+    leaked[check[island_leak | vert_leak]] = True
+
+    n_groups = table.n_groups
+    n_far = np.bincount(uniq[far_island] // n_islands, minlength=n_groups)
+    n_vert = np.bincount(groups[check[vert_leak]], minlength=n_groups)
+    mass = np.bincount(groups[leaked], weights=table.weights[leaked], minlength=n_groups)
+    stats = [(table.group_names[gi], int(n_far[gi]), int(n_vert[gi]), float(mass[gi]))
+             for gi in np.flatnonzero(n_far + n_vert)]
+    stats.sort(key=lambda s: s[3], reverse=True)
+    return LeakReport(table.n_verts, distance, np.unique(rows[leaked]), leaked, stats)
+
+
+def drop_entries(table, drop, renormalize=None):
+    """Copy of `table` without the entries in `drop` (bool per entry).
+
+    With `renormalize` (bool per group), verts that lost weight have those
+    groups rescaled to their previous total.
+    """
+    rows = table.rows()
+    keep = ~drop
+    values = table.weights.copy()
+    if renormalize is not None:
+        part = np.asarray(renormalize, dtype=bool)[table.groups]
+        before = np.bincount(rows[part], weights=values[part], minlength=table.n_verts)
+        after = np.bincount(rows[part & keep], weights=values[part & keep], minlength=table.n_verts)
+        touched = np.zeros(table.n_verts, dtype=bool)
+        touched[rows[drop]] = True
+        scale = np.where(touched & (after > weights.WEIGHT_EPS), before / np.maximum(after, weights.WEIGHT_EPS), 1.0)
+        values = np.where(part, values * scale[rows], values)
+    return weights.WeightTable.from_coo(rows[keep], table.groups[keep], values[keep],
+                                        table.n_verts, table.group_names)
+
+
+# ===== Unused groups =====
+
+class GroupScan:
+    """Result of unused_groups()."""
+
+    __slots__ = ('n_verts', 'threshold', 'unused')
+
+    def __init__(self, n_verts, threshold, unused):
+        self.n_verts = n_verts
+        self.threshold = threshold
+        self.unused = unused          # [(group index, name, reason, peak weight)]
+
+
+def unused_groups(table, threshold, bone_names=None, keep=(), keep_weighted=()):
+    """Find the groups of `table` that can go, in one pass over its entries.
+
+    A group is 'EMPTY' without any weight above WEIGHT_EPS, 'WEAK' when its
+    peak weight is at or below `threshold`, and 'ORPHAN' when `bone_names`
+    (e.g. the rig's deform bones) is given and doesn't contain its name.
+    Names in `keep` are never reported, names in `keep_weighted` only when
+    they are empty.
+    """
+    peak = np.zeros(table.n_groups, dtype=np.float32)
+    np.maximum.at(peak, table.groups, table.weights)
+    bones = set(bone_names) if bone_names is not None else None
+    unused = []
+    for gi, name in enumerate(table.group_names):
+        if name in keep:
+            continue
+        w = float(peak[gi])
+        if w <= weights.WEIGHT_EPS:
+            reason = 'EMPTY'
+        elif w <= threshold:
+            reason = 'WEAK'
+        elif bones is not None and name not in bones:
+            reason = 'ORPHAN'
+        else:
+            continue
+        if reason != 'EMPTY' and name in keep_weighted:
+            continue
+        unused.append((gi, name, reason, w))
+    return GroupScan(table.n_verts, threshold, unused)
+
+
+# ===== Weight diff =====
+
+class DiffReport:
+    """Result of weight_diff()."""
+
+    __slots__ = ('n_verts', 'label', 'max_change', 'groups', 'added', 'removed')
+
+    def __init__(self, n_verts, label, max_change, groups, added, removed):
+        self.n_verts = n_verts
+        self.label = label
+        self.max_change = max_change  # per-vertex largest |after - before| over all groups
+        self.groups = groups          # [(name, n_verts changed, max change)], largest first
+        self.added = added            # group names only in `after`
+        self.removed = removed        # group names only in `before`
+
+    @property
+    def n_changed(self):
+        return int((self.max_change > 0.0).sum())
+
+
+def weight_diff(before, after, label='', tolerance=1e-4):
+    """Sparse difference of two weight tables over the same vertices, groups matched by name.
+
+    Groups are compared a chunk at a time (GROUP_CHUNK), so only the entries
+    of those groups are expanded at once. Changes at or below `tolerance`
+    are ignored; a group present on one side only counts as all-changed.
+    """
+    n = before.n_verts
+    names = list(before.group_names)
+    index = {name: i for i, name in enumerate(names)}
+    for name in after.group_names:
+        if name not in index:
+            index[name] = len(names)
+            names.append(name)
+    remap = np.array([index[name] for name in after.group_names] or [0], dtype=np.int32)
+
+    # Both sides as one signed entry list: -before, +after, groups in union order.
+    rows = np.concatenate((before.rows(), after.rows()))
+    groups = np.concatenate((before.groups, remap[after.groups]))
+    values = np.concatenate((-before.weights, after.weights))
+    max_change = np.zeros(n, dtype=np.float32)
+    stats = []
+    for start in range(0, len(names), GROUP_CHUNK):
+        width = min(GROUP_CHUNK, len(names) - start)
+        sel = np.flatnonzero((groups >= start) & (groups < start + width))
+        keys = rows[sel].astype(np.int64) * width + (groups[sel] - start)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        if not len(keys):
+            continue
+        first = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        delta = np.abs(np.add.reduceat(values[sel][order], first))
+        changed = delta > tolerance
+        keys, delta = keys[first][changed], delta[changed]
+        vert, col = keys // width, keys % width
+        np.maximum.at(max_change, vert, delta)
+        counts = np.bincount(col, minlength=width)
+        worst = np.zeros(width, dtype=np.float32)
+        np.maximum.at(worst, col, delta)
+        for c in np.flatnonzero(counts).tolist():
+            stats.append((names[start + c], int(counts[c]), float(worst[c])))
+    stats.sort(key=lambda s: (s[2], s[1]), reverse=True)
+    after_names = set(after.group_names)
+    return DiffReport(n, label, max_change, stats,
+                      names[len(before.group_names):],
+                      [name for name in before.group_names if name not in after_names])
+
+
+# ===== Pose deformation sweep =====
+
+class DeformationSweep:
+    """Worst-case per-vertex deformation of a mesh over a set of poses.
+
+    Edge length ratios against rest give stretch (ratio - 1) and compression
+    (1 - ratio); triangle area ratios give volume loss (1 - ratio). Each
+    vertex keeps the worst value of its incident edges / triangles over every
+    pose added so far, and every pose gets a one-line summary.
+    """
+
+    __slots__ = ('n_verts', 'edges', 'tris', 'rest_length', 'rest_area',
+                 'stretch', 'compression', 'volume_loss', 'poses')
+
+    def __init__(self, co, edges, tris):
+        self.n_verts = len(co)
+        self.edges = edges
+        self.tris = tris
+        self.rest_length = np.maximum(_edge_lengths(co[None], edges)[0], 1e-9)
+        self.rest_area = np.maximum(_tri_areas(co[None], tris)[0], 1e-12)
+        self.stretch = np.zeros(self.n_verts, dtype=np.float32)
+        self.compression = np.zeros(self.n_verts, dtype=np.float32)
+        self.volume_loss = np.zeros(self.n_verts, dtype=np.float32)
+        self.poses = []               # [(name, max stretch, max compression, max volume loss)]
+
+    def add(self, names, posed):
+        """Accumulate posed positions (poses, n_verts, 3) named `names`."""
+        ratio = _edge_lengths(posed, self.edges) / self.rest_length
+        area = _tri_areas(posed, self.tris) / self.rest_area
+        stretch = ratio.max(axis=0) - 1.0
+        compression = 1.0 - ratio.min(axis=0)
+        loss = 1.0 - area.min(axis=0)
+        for col in range(2):
+            np.maximum.at(self.stretch, self.edges[:, col], stretch)
+            np.maximum.at(self.compression, self.edges[:, col], compression)
+        for col in range(3):
+            np.maximum.at(self.volume_loss, self.tris[:, col], loss)
+        for i, name in enumerate(names):
+            self.poses.append((name,
+                               float(ratio[i].max(initial=1.0) - 1.0),
+                               float(1.0 - ratio[i].min(initial=1.0)),
+                               float(1.0 - area[i].min(initial=1.0))))
+
+    def worst_poses(self, count=5):
+        """Poses sorted by their worst single metric."""
+        return sorted(self.poses, key=lambda p: max(p[1:]), reverse=True)[:count]
+
+
+def _edge_lengths(co, edges):
+    """(poses, n_edges) lengths for positions (poses, n, 3)."""
+    return np.linalg.norm(co[:, edges[:, 0]] - co[:, edges[:, 1]], axis=2)
+
+
+def _tri_areas(co, tris):
+    """(poses, n_tris) doubled triangle areas for positions (poses, n, 3)."""
+    a = co[:, tris[:, 0]]
+    return np.linalg.norm(np.cross(co[:, tris[:, 1]] - a, co[:, tris[:, 2]] - a), axis=2)
+
+
+# ===== Influence budget =====
+
+class BudgetReport:
+    """Result of influence_budget()."""
+
+    __slots__ = ('n_verts', 'limit', 'bits', 'histogram', 'n_over', 'lost_mass', 'max_lost',
+                 'quant_max', 'quant_mean')
+
+    def __init__(self, n_verts, limit, bits, histogram, n_over, lost_mass, max_lost, quant_max, quant_mean):
+        self.n_verts = n_verts
+        self.limit = limit
+        self.bits = bits
+        self.histogram = histogram    # verts per influence count (index = count)
+        self.n_over = n_over          # verts with more than `limit` influences
+        self.lost_mass = lost_mass    # total weight dropped by limiting
+        self.max_lost = max_lost      # worst per-vertex fraction of weight dropped
+        self.quant_max = quant_max    # worst |quantized - exact| after limit + normalize
+        self.quant_mean = quant_mean
+
+
+def influence_budget(table, limit, bits, subset=None):
+    """Measure what limiting to `limit` influences and `bits`-bit weights does to `table`.
+
+    Only `subset` groups (bool per group, e.g. deform bones) count as
+    influences. The lost mass is measured before renormalization; the
+    quantization error after limit + renormalize, as an engine would see it.
+    """
+    rows = table.rows()
+    part = table.weights > weights.WEIGHT_EPS
+    if subset is not None:
+        part &= np.asarray(subset, dtype=bool)[table.groups]
+    counts = np.bincount(rows[part], minlength=table.n_verts)
+    totals = np.bincount(rows[part], weights=table.weights[part], minlength=table.n_verts)
+
+    limited = weights.prune_table(table, 0.0, limit, False, subset)
+    l_rows = limited.rows()
+    l_part = np.ones(len(limited.groups), dtype=bool) if subset is None else np.asarray(subset, dtype=bool)[limited.groups]
+    kept = np.bincount(l_rows[l_part], weights=limited.weights[l_part], minlength=table.n_verts)
+    lost = np.maximum(totals - kept, 0.0)
+    lost_frac = np.divide(lost, totals, out=np.zeros_like(lost), where=totals > weights.WEIGHT_EPS)
+
+    normalized = weights.prune_table(limited, 0.0, 0, True, subset)
+    n_rows = normalized.rows()
+    n_part = np.ones(len(normalized.groups), dtype=bool) if subset is None else np.asarray(subset, dtype=bool)[normalized.groups]
+    quantized = weights.quantized_values(n_rows, normalized.weights, n_part, table.n_verts, bits)
+    error = np.abs(quantized - normalized.weights)[n_part]
+
+    return BudgetReport(table.n_verts, limit, bits, np.bincount(counts), int((counts > limit).sum()),
+                        float(lost.sum()), float(lost_frac.max(initial=0.0)),
+                        float(error.max(initial=0.0)), float(error.mean()) if len(error) else 0.0)
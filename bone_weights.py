@@ -0,0 +1,93 @@
+"""Geometry-only weight initialisation from bone segments.
+
+Everything here is NumPy on plain arrays: vertex positions and bone
+head / tail positions in the same space (world space in the operators).
+"""
+
+import numpy as np
+
+from .weights import WeightTable
+
+# Upper bound on vertex × bone entries held at once while measuring distances.
+CHUNK_ENTRIES = 1 << 20
+
+
+def deform_segments(rig):
+    """(names, heads, tails) of `rig`'s deform bones, rest pose, world space."""
+    bones = [b for b in rig.data.bones if b.use_deform]
+    n = len(bones)
+    heads = np.empty(n * 3, dtype=np.float64)
+    tails = np.empty(n * 3, dtype=np.float64)
+    for i, b in enumerate(bones):
+        heads[3 * i:3 * i + 3] = b.head_local
+        tails[3 * i:3 * i + 3] = b.tail_local
+    mat = np.array(rig.matrix_world, dtype=np.float64)
+    rot, loc = mat[:3, :3].T, mat[:3, 3]
+    return [b.name for b in bones], heads.reshape(-1, 3) @ rot + loc, tails.reshape(-1, 3) @ rot + loc
+
+
+def segment_distances(points, heads, tails):
+    """(n_points, n_bones) distance from every point to every head–tail segment."""
+    axis = tails - heads
+    length_sq = np.maximum(np.einsum('ij,ij->i', axis, axis), 1e-20)
+    rel = points[:, None, :] - heads[None, :, :]
+    t = np.clip(np.einsum('nbj,bj->nb', rel, axis) / length_sq, 0.0, 1.0)
+    rel -= t[..., None] * axis[None, :, :]
+    return np.sqrt(np.einsum('nbj,nbj->nb', rel, rel))
+
+
+def paired_distances(points, heads, tails):
+    """Distance from each point to its own segment (all three arrays are (n, 3))."""
+    axis = tails - heads
+    rel = points - heads
+    t = np.einsum('ij,ij->i', rel, axis) / np.maximum(np.einsum('ij,ij->i', axis, axis), 1e-20)
+    rel -= np.clip(t, 0.0, 1.0)[:, None] * axis
+    return np.sqrt(np.einsum('ij,ij->i', rel, rel))
+
+
+def nearest_segment(points, heads, tails):
+    """(index, distance) of the closest segment for every point, chunked."""
+    n = len(points)
+    index = np.empty(n, dtype=np.int64)
+    dist = np.empty(n, dtype=np.float64)
+    step = max(1, CHUNK_ENTRIES // max(len(heads), 1))
+    for start in range(0, n, step):
+        d = segment_distances(points[start:start + step], heads, tails)
+        index[start:start + step] = d.argmin(axis=1)
+        dist[start:start + step] = d[np.arange(len(d)), index[start:start + step]]
+    return index, dist
+
+
+def distance_weights(points, heads, tails, names, max_influences=4,
+                     falloff='INVERSE', power=2.0, radius=0.1):
+    """Normalised weights of each point from its `max_influences` nearest segments.
+
+    'INVERSE' weights a segment by (nearest / distance) ** power; 'GAUSSIAN'
+    by exp(-((distance - nearest) / radius) ** 2), so bones more than a few
+    radii farther than the closest one fade out. Returns a WeightTable whose
+    groups are `names`.
+    """
+    n, n_bones = len(points), len(heads)
+    k = min(max_influences, n_bones) if max_influences > 0 else n_bones
+    step = max(1, CHUNK_ENTRIES // max(n_bones, 1))
+    rows, cols, vals = [], [], []
+    for start in range(0, n, step):
+        d = segment_distances(points[start:start + step], heads, tails)
+        if k < n_bones:
+            top = np.argpartition(d, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n_bones), d.shape)
+        dk = np.take_along_axis(d, top, axis=1)
+        nearest = dk.min(axis=1, keepdims=True)
+        if falloff == 'GAUSSIAN':
+            w = np.exp(-((dk - nearest) / max(radius, 1e-9)) ** 2)
+        else:
+            w = (np.maximum(nearest, 1e-9) / np.maximum(dk, 1e-9)) ** power
+        w /= w.sum(axis=1, keepdims=True)
+        rows.append(np.repeat(np.arange(start, start + len(d)), k))
+        cols.append(top.ravel())
+        vals.append(w.ravel())
+    if not rows:
+        return WeightTable.from_coo([], [], [], n, names)
+    return WeightTable.from_coo(np.concatenate(rows), np.concatenate(cols),
+                                np.concatenate(vals), n, names)
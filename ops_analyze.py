@@ -0,0 +1,553 @@
+"""Weight QA operators for My Simp: checks that flag problem verts and groups."""
+
+import bpy
+import numpy as np
+from mathutils import Euler, Matrix, Quaternion
+
+from . import keymaps
+from . import analysis, bone_weights, skinning, smoothing, transfer, utils, weight_history, weights
+
+# Point attributes written by the pose QA sweep.
+QA_ATTRIBUTES = ('wpt_stretch', 'wpt_compression', 'wpt_volume_loss')
+
+
+def _enter_object_mode(context):
+    """Switch to Object mode; returns a callable restoring the previous mode."""
+    original_mode = context.mode
+    if original_mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    def restore():
+        if original_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+        elif original_mode == 'PAINT_WEIGHT':
+            bpy.ops.object.mode_set(mode='WEIGHT_PAINT')
+    return restore
+
+
+class WPT_OT_FindSpikes(bpy.types.Operator):
+    """Flag and select verts whose weights jump away from their neighbours"""
+    bl_idname = "wpt.find_spikes"
+    bl_label = "Find Spikes"
+    bl_description = ("Select verts whose weight in any group deviates from the neighbour average "
+                      "by more than the threshold, and list the worst groups")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj is not None
+                and obj.type == 'MESH'
+                and len(obj.vertex_groups) > 0)
+
+    def execute(self, context):
+        obj = context.active_object
+        mesh = obj.data
+        threshold = context.scene.wpt_analyze.spike_threshold
+        restore = _enter_object_mode(context)
+        try:
+            table = weights.read_weight_table(obj)
+            op = weights.smoothing_operator(mesh)
+            report = analysis.find_spikes(table, op, weights.edge_array(mesh), threshold)
+            analysis.store_report(mesh, 'spikes', report)
+            weights.select_vertices(mesh, report.flagged)
+        finally:
+            restore()
+
+        if context.mode == 'PAINT_WEIGHT':
+            mesh.use_paint_mask_vertex = True
+        n = len(report.flagged)
+        if n:
+            self.report({'WARNING'}, f"{n} spike vert(s) in {len(report.groups)} group(s) selected")
+        else:
+            self.report({'INFO'}, "No spikes found")
+        return {'FINISHED'}
+
+
+class WPT_OT_FixSpikes(bpy.types.Operator):
+    """Repair spike verts in place, leaving the rest of the mesh alone"""
+    bl_idname = "wpt.fix_spikes"
+    bl_label = "Fix Spikes"
+    bl_description = ("Find spikes in unlocked groups and correct only those verts and their "
+                      "one-ring (neighbour mean or median), keeping vertex totals")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj is not None
+                and obj.type == 'MESH'
+                and len(obj.vertex_groups) > 0)
+
+    def execute(self, context):
+        obj = context.active_object
+        mesh = obj.data
+        settings = context.scene.wpt_analyze
+        unlocked = [i for i, g in enumerate(obj.vertex_groups) if not g.lock_weight]
+        if not unlocked:
+            self.report({'WARNING'}, "No unlocked vertex groups")
+            return {'CANCELLED'}
+
+        restore = _enter_object_mode(context)
+        try:
+            table = weights.read_weight_table(obj)
+            op = weights.smoothing_operator(mesh)
+            found = analysis.find_spikes(table, op, weights.edge_array(mesh),
+                                         settings.spike_threshold, unlocked)
+            if not len(found.flagged):
+                analysis.store_report(mesh, 'spikes', found)
+                self.report({'INFO'}, "No spikes found")
+                return {'FINISHED'}
+
+            # Columns: unlocked groups anywhere the repair reads or writes.
+            region = np.zeros(len(mesh.vertices), dtype=bool)
+            region[found.flagged] = True
+            ring = op.take_rows(found.flagged).indices
+            region[ring] = True
+            region[op.take_rows(ring).indices] = True
+            cols = np.intersect1d(table.groups_in(region), unlocked)
+
+            block = table.dense(cols)
+            original = block.copy()
+            rows = smoothing.fix_spikes(block, op, found.flagged, settings.fix_method)
+            old = original[rows]
+            new = block[rows]
+            weights.write_dense_changes(obj, cols, rows, old, new)
+            weight_history.record_block(obj, "Fix Spikes", cols, rows, old, new)
+            analysis.store_report(mesh, 'spikes', None)
+        finally:
+            restore()
+
+        self.report({'INFO'}, f"Fixed {len(found.flagged)} spike vert(s), {len(rows)} vert(s) touched")
+        return {'FINISHED'}
+
+
+class WPT_OT_FindLeaks(bpy.types.Operator):
+    """Find (and optionally purge) weight that sits far from its bone"""
+    bl_idname = "wpt.find_leaks"
+    bl_label = "Find Leaks"
+    bl_description = ("Select verts whose weight in a bone's group lies farther than the leak distance "
+                      "from that bone, on detached islands or across the body")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    purge: bpy.props.BoolProperty(
+        name="Purge",
+        description="Remove the leaked weights instead of only selecting them",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj is not None
+                and obj.type == 'MESH'
+                and len(obj.vertex_groups) > 0)
+
+    def execute(self, context):
+        obj = context.active_object
+        mesh = obj.data
+        settings = context.scene.wpt_analyze
+        rig = keymaps._wpt_find_rig_for_mesh(obj)
+        if rig is None:
+            self.report({'WARNING'}, f"{obj.name} is not deformed by an armature")
+            return {'CANCELLED'}
+        names, bone_heads, bone_tails = bone_weights.deform_segments(rig)
+        bone_index = {name: i for i, name in enumerate(names)}
+
+        restore = _enter_object_mode(context)
+        try:
+            table = weights.read_weight_table(obj)
+            heads = np.full((table.n_groups, 3), np.nan)
+            tails = np.full((table.n_groups, 3), np.nan)
+            for gi, name in enumerate(table.group_names):
+                bi = bone_index.get(name)
+                if bi is not None:
+                    heads[gi], tails[gi] = bone_heads[bi], bone_tails[bi]
+            report = analysis.find_leaks(table, weights.mesh_islands(mesh), transfer.world_coords(obj),
+                                         heads, tails, settings.leak_distance)
+            if self.purge and len(report.flagged):
+                renormalize = None
+                if settings.leak_normalize:
+                    renormalize = ~np.isnan(heads[:, 0])
+                purged = analysis.drop_entries(table, report.leaked, renormalize)
+                weight_history.apply_table(obj, purged, "Purge Leaks")
+                analysis.store_report(mesh, 'leaks', None)
+            else:
+                analysis.store_report(mesh, 'leaks', report)
+            weights.select_vertices(mesh, report.flagged)
+        finally:
+            restore()
+
+        if context.mode == 'PAINT_WEIGHT':
+            mesh.use_paint_mask_vertex = True
+        n = len(report.flagged)
+        if not n:
+            self.report({'INFO'}, "No leaks found")
+        elif self.purge:
+            self.report({'INFO'}, f"Purged leaked weight from {n} vert(s) in {len(report.groups)} group(s)")
+        else:
+            self.report({'WARNING'}, f"{n} vert(s) with leaked weight in {len(report.groups)} group(s) selected")
+        return {'FINISHED'}
+
+
+def _active_rig(context):
+    """The active armature, or the armature deforming the active mesh (None for an unrigged mesh)."""
+    obj = context.active_object
+    if obj is not None and obj.type == 'MESH':
+        return keymaps._wpt_find_rig_for_mesh(obj)
+    return utils.find_armature_for_object(context)
+
+
+def _rig_meshes(context):
+    """(rig, meshes) for the active object: every mesh the rig deforms, or just the active mesh without one."""
+    rig = _active_rig(context)
+    obj = context.active_object
+    if rig is not None:
+        meshes = [ob for ob in context.scene.objects
+                  if ob.type == 'MESH' and keymaps._wpt_find_rig_for_mesh(ob) == rig]
+        if meshes:
+            return rig, meshes
+    return rig, [obj] if obj is not None and obj.type == 'MESH' else []
+
+
+def _deform_subset(table, rig):
+    """Bool per table group: named after a deform bone of `rig` (all groups without a rig)."""
+    if rig is None:
+        return None
+    deform = {b.name for b in rig.data.bones if b.use_deform}
+    return np.array([name in deform for name in table.group_names], dtype=bool)
+
+
+class WPT_OT_AnalyzeBudget(bpy.types.Operator):
+    """Measure influence counts, limiting loss and quantization error against the export budget"""
+    bl_idname = "wpt.analyze_budget"
+    bl_label = "Analyze Budget"
+    bl_description = ("For every mesh of the rig: influence-count histogram, weight lost by limiting "
+                      "and quantization error at the chosen bit depth")
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type in {'MESH', 'ARMATURE'} and context.mode != 'EDIT_MESH'
+
+    def execute(self, context):
+        settings = context.scene.wpt_analyze
+        rig, meshes = _rig_meshes(context)
+        if not meshes:
+            self.report({'WARNING'}, "No meshes to analyze")
+            return {'CANCELLED'}
+        n_over = 0
+        worst = 0.0
+        for ob in meshes:
+            table = weights.read_weight_table(ob)
+            report = analysis.influence_budget(table, settings.budget_limit, settings.budget_bits,
+                                               _deform_subset(table, rig))
+            analysis.store_report(ob.data, 'budget', report)
+            n_over += report.n_over
+            worst = max(worst, report.max_lost)
+        self.report({'INFO'}, f"{len(meshes)} mesh(es): {n_over} vert(s) over {settings.budget_limit} "
+                              f"influences, worst loss {worst:.1%}")
+        return {'FINISHED'}
+
+
+class WPT_OT_ApplyBudget(bpy.types.Operator):
+    """Limit influences, quantize and renormalize weights on every mesh of the rig"""
+    bl_idname = "wpt.apply_budget"
+    bl_label = "Limit + Quantize"
+    bl_description = ("Keep the strongest influences per vertex, renormalize and snap deform weights "
+                      "to the chosen bit depth on every mesh of the rig")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type in {'MESH', 'ARMATURE'} and context.mode != 'EDIT_MESH'
+
+    def execute(self, context):
+        settings = context.scene.wpt_analyze
+        rig, meshes = _rig_meshes(context)
+        if not meshes:
+            self.report({'WARNING'}, "No meshes to process")
+            return {'CANCELLED'}
+        written = 0
+        for ob in meshes:
+            table = weights.read_weight_table(ob)
+            subset = _deform_subset(table, rig)
+            limited = weights.prune_table(table, weights.WEIGHT_EPS, settings.budget_limit, True, subset)
+            final = weights.quantize_table(limited, settings.budget_bits, subset)
+            written += weight_history.apply_table(ob, final, "Limit + Quantize")
+        self.report({'INFO'}, f"Limited to {settings.budget_limit} influences at {settings.budget_bits} bits "
+                              f"on {len(meshes)} mesh(es) ({written} values)")
+        return {'FINISHED'}
+
+
+def _collect_group_refs(struct, names, seen, depth=0):
+    """Add every '*vertex_group*' string found in `struct` and its nested settings to `names`.
+
+    Follows pointer and collection properties into non-ID structs (cloth /
+    soft body / collision settings, dynamic paint surfaces, ...), a few
+    levels deep. Other datablocks are not entered.
+    """
+    if struct is None or depth > 4 or isinstance(struct, bpy.types.ID) or struct.as_pointer() in seen:
+        return
+    seen.add(struct.as_pointer())
+    for prop in struct.bl_rna.properties:
+        ident = prop.identifier
+        if ident == 'rna_type':
+            continue
+        if prop.type == 'STRING':
+            if 'vertex_group' in ident:
+                names.add(getattr(struct, ident))
+        elif prop.type == 'POINTER':
+            _collect_group_refs(getattr(struct, ident), names, seen, depth + 1)
+        elif prop.type == 'COLLECTION':
+            for item in getattr(struct, ident):
+                _collect_group_refs(item, names, seen, depth + 1)
+
+
+def _referenced_groups(obj):
+    """Names of vertex groups that modifiers, particle systems or shape keys of `obj` point at."""
+    names = set()
+    seen = set()
+    for mod in obj.modifiers:
+        _collect_group_refs(mod, names, seen)
+        # Geometry Nodes inputs driven by an attribute keep its name in an ID property.
+        for key in mod.keys():
+            if key.endswith('_attribute_name') and isinstance(mod[key], str):
+                names.add(mod[key])
+    for psys in obj.particle_systems:
+        _collect_group_refs(psys, names, seen)
+    keys = obj.data.shape_keys
+    if keys is not None:
+        names.update(kb.vertex_group for kb in keys.key_blocks)
+    names.discard('')
+    return names
+
+
+class WPT_OT_PurgeGroups(bpy.types.Operator):
+    """Find (and optionally remove) unused vertex groups on every mesh of the rig"""
+    bl_idname = "wpt.purge_groups"
+    bl_label = "Purge Groups"
+    bl_description = ("Find empty groups and deform-bone groups that never exceed the threshold on every "
+                      "mesh of the rig; with Non-Bone on, also weighted groups without a deform bone. Locked "
+                      "groups and groups used by modifiers, particles or shape keys are always kept")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    purge: bpy.props.BoolProperty(
+        name="Purge",
+        description="Remove the groups instead of only listing them",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type in {'MESH', 'ARMATURE'} and context.mode != 'EDIT_MESH'
+
+    def execute(self, context):
+        settings = context.scene.wpt_groups
+        rig, meshes = _rig_meshes(context)
+        if not meshes:
+            self.report({'WARNING'}, "No meshes to process")
+            return {'CANCELLED'}
+        bone_names = [b.name for b in rig.data.bones if b.use_deform] if rig is not None else None
+        bones = set(bone_names or ())
+
+        found = 0
+        for ob in meshes:
+            table = weights.read_weight_table(ob)
+            keep = _referenced_groups(ob)
+            keep.update(vg.name for vg in ob.vertex_groups if vg.lock_weight)
+            # Groups without a deform bone may be masks or pins used by
+            # something we can't see; unless empty, only touch them on request.
+            keep_weighted = set()
+            if not settings.purge_orphans:
+                keep_weighted = {name for name in table.group_names if name not in bones}
+            scan = analysis.unused_groups(table, settings.purge_threshold, bone_names, keep, keep_weighted)
+            found += len(scan.unused)
+            if not self.purge or not scan.unused:
+                analysis.store_report(ob.data, 'groups', scan)
+                continue
+            # Clear the weights through the history first so undo restores them.
+            drop = np.zeros(table.n_groups, dtype=bool)
+            drop[[gi for gi, _name, _reason, _peak in scan.unused]] = True
+            weight_history.apply_table(ob, analysis.drop_entries(table, drop[table.groups]), "Purge Groups")
+            vgroups = ob.vertex_groups
+            for _gi, name, _reason, _peak in scan.unused:
+                vgroups.remove(vgroups[name])
+            analysis.store_report(ob.data, 'groups', None)
+
+        if not found:
+            self.report({'INFO'}, f"No unused groups on {len(meshes)} mesh(es)")
+        elif self.purge:
+            self.report({'INFO'}, f"Removed {found} group(s) from {len(meshes)} mesh(es)")
+        else:
+            self.report({'WARNING'}, f"{found} unused group(s) on {len(meshes)} mesh(es)")
+        return {'FINISHED'}
+
+
+def _pose_basis(skeleton, pose_data):
+    """(bones, 4, 4) matrix_basis for a stored pose dict (missing bones stay at rest)."""
+    basis = np.tile(np.eye(4), (len(skeleton.names), 1, 1))
+    index = {name: i for i, name in enumerate(skeleton.names)}
+    for name, data in pose_data.items():
+        i = index.get(name)
+        if i is None:
+            continue
+        if 'rotation_quaternion' in data:
+            rot = Quaternion(data['rotation_quaternion']).to_matrix()
+        else:
+            mode = data.get('rotation_mode', 'XYZ')
+            rot = Euler(data.get('rotation_euler', (0.0, 0.0, 0.0)),
+                        mode if len(mode) == 3 else 'XYZ').to_matrix()
+        scale = Matrix.Diagonal((*data.get('scale', (1.0, 1.0, 1.0)), 1.0))
+        basis[i] = np.array(Matrix.Translation(data.get('location', (0.0, 0.0, 0.0))) @ rot.to_4x4() @ scale)
+    return basis
+
+
+class WPT_OT_PoseQASweep(bpy.types.Operator):
+    """Skin every mesh of the rig through every saved pose and record the worst deformation"""
+    bl_idname = "wpt.pose_qa_sweep"
+    bl_label = "Pose QA Sweep"
+    bl_description = ("Evaluate every saved pose on every mesh of the rig (NumPy skinning, scene untouched) "
+                      "and store worst-case stretch, compression and volume loss as point attributes")
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return (_active_rig(context) is not None
+                and len(context.scene.pose_collection) > 0)
+
+    def _prepare(self, context):
+        """Build the per-mesh jobs and batch list; False (already reported) if there's nothing to sweep."""
+        rig, meshes = _rig_meshes(context)
+        meshes = [ob for ob in meshes if keymaps._wpt_find_rig_for_mesh(ob) == rig]
+        if not meshes:
+            self.report({'WARNING'}, f"No meshes deformed by {rig.name}")
+            return False
+        if context.mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        skeleton = skinning.Skeleton(rig)
+        deform = np.array([b.use_deform for b in rig.data.bones], dtype=bool)
+        self._names, bases = [], []
+        for pose in context.scene.pose_collection:
+            data = utils.load_pose_data_from_json(pose.pose_data)
+            if data:
+                self._names.append(pose.name)
+                bases.append(_pose_basis(skeleton, data))
+        if not bases:
+            self.report({'WARNING'}, "No readable poses in the pose library")
+            return False
+        bases = np.array(bases)
+        rig_inv = np.linalg.inv(np.array(rig.matrix_world))
+
+        # One job per mesh: rest coords, binding, skinning matrices, accumulator.
+        self._jobs = []
+        for ob in meshes:
+            mesh = ob.data
+            co = weights.vertex_coords(mesh).astype(np.float64)
+            to_armature = rig_inv @ np.array(ob.matrix_world)
+            binding = skinning.SkinBinding(weights.read_weight_table(ob), skeleton.names, deform)
+            use_dqs = any(m.type == 'ARMATURE' and m.object == rig and m.use_deform_preserve_volume
+                          for m in ob.modifiers)
+            sweep = analysis.DeformationSweep(co, weights.edge_array(mesh), weights.loop_triangle_array(mesh))
+            self._jobs.append((ob, co, binding, skeleton.skinning_matrices(bases, to_armature), use_dqs, sweep))
+
+        batch = context.scene.wpt_analyze.qa_batch_size
+        self._work = [(j, start) for j in range(len(self._jobs)) for start in range(0, len(bases), batch)]
+        self._batch = batch
+        self._done = 0
+        return True
+
+    def _run_batch(self):
+        """Skin and measure the next batch of poses on one mesh."""
+        j, start = self._work[self._done]
+        ob, co, binding, matrices, use_dqs, sweep = self._jobs[j]
+        stop = min(start + self._batch, len(self._names))
+        if use_dqs:
+            posed = np.array([skinning.dual_quaternion_blend(co, binding, m) for m in matrices[start:stop]])
+        else:
+            posed = skinning.linear_blend(co, binding, matrices[start:stop])
+        sweep.add(self._names[start:stop], posed)
+        self._done += 1
+
+    def _store(self):
+        """Write the sweep results as point attributes and cached reports."""
+        worst = 0.0
+        for ob, _co, _binding, _matrices, _dqs, sweep in self._jobs:
+            mesh = ob.data
+            for name, values in zip(QA_ATTRIBUTES, (sweep.stretch, sweep.compression, sweep.volume_loss)):
+                weights.write_point_attribute(mesh, name, values)
+            mesh.update()
+            analysis.store_report(mesh, 'deform', sweep)
+            worst = max(worst, max((max(p[1:]) for p in sweep.poses), default=0.0))
+        self.report({'INFO'}, f"Swept {len(self._names)} pose(s) on {len(self._jobs)} mesh(es), "
+                              f"worst deformation {worst:.0%}")
+
+    def execute(self, context):
+        if not self._prepare(context):
+            return {'CANCELLED'}
+        while self._done < len(self._work):
+            self._run_batch()
+        self._store()
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if not self._prepare(context):
+            return {'CANCELLED'}
+        wm = context.window_manager
+        wm.progress_begin(0, len(self._work))
+        self._timer = wm.event_timer_add(0.001, window=context.window)
+        wm.modal_handler_add(self)
+        self._header(context)
+        return {'RUNNING_MODAL'}
+
+    def _header(self, context):
+        if context.area:
+            context.area.header_text_set(
+                f"Pose QA: batch {self._done}/{len(self._work)} (ESC to cancel)")
+
+    def _finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        if context.area:
+            context.area.header_text_set(None)
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self._finish(context)
+            self.report({'INFO'}, "Pose QA sweep cancelled")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        self._run_batch()
+        context.window_manager.progress_update(self._done)
+        self._header(context)
+        if self._done < len(self._work):
+            return {'RUNNING_MODAL'}
+
+        self._finish(context)
+        self._store()
+        return {'FINISHED'}
+
+
+classes = (
+    WPT_OT_FindSpikes,
+    WPT_OT_FixSpikes,
+    WPT_OT_FindLeaks,
+    WPT_OT_PoseQASweep,
+    WPT_OT_AnalyzeBudget,
+    WPT_OT_ApplyBudget,
+    WPT_OT_PurgeGroups,
+)
+
+weight_history.register_history_operators(
+    WPT_OT_FixSpikes,
+    WPT_OT_FindLeaks,
+    WPT_OT_ApplyBudget,
+    WPT_OT_PurgeGroups,
+)
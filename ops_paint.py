@@ -1,10 +1,15 @@
 """Paint and weight-manipulation operators for My Simp."""
 
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 import bpy
+import numpy as np
 from bpy.utils import flip_name
-from mathutils.kdtree import KDTree
 
 from . import keymaps  # for _wpt_last_rig (auto-follow state stamp)
+from . import bone_weights, smoothing, transfer, utils, weight_history, weights
 
 
 class WPT_OT_SetBrushMode(bpy.types.Operator):
@@ -195,7 +200,9 @@ class WPT_OT_MirrorWeights(bpy.types.Operator):
         prev_mode = obj.mode
         try:
             bpy.ops.object.mode_set(mode='OBJECT')
+            before = weights.read_weight_table(obj)
             self.symmetrize_vertex_group(obj, vg_name, self.axis)
+            weight_history.record_tables(obj, f"Mirror {vg_name}", before, weights.read_weight_table(obj))
             bpy.ops.object.mode_set(mode=prev_mode)
             self.report({'INFO'}, f"Mirrored weights across {self.axis}-axis")
             return {'FINISHED'}
@@ -209,20 +216,8 @@ class WPT_OT_MirrorWeights(bpy.types.Operator):
 
     def symmetrize_vertex_group(self, obj, vg_name, axis='X', threshold=0.0001):
         vertices = obj.data.vertices
-        size = len(vertices)
-        kd = KDTree(size)
-        for i, v in enumerate(vertices):
-            kd.insert(v.co, i)
-        kd.balance()
-
-        coord_i = 'XYZ'.find(axis)
-        vert_map = {}
-        for vert_idx, vert in enumerate(vertices):
-            flipped_co = vert.co.copy()
-            flipped_co[coord_i] *= -1
-            _opposite_co, opposite_idx, dist = kd.find(flipped_co)
-            if dist <= threshold:
-                vert_map[vert_idx] = opposite_idx
+        mirror = weights.mirror_vertex_map(obj.data, axis, threshold)
+        vert_map = {i: int(m) for i, m in enumerate(mirror) if m >= 0}
 
         vgroup = obj.vertex_groups.get(vg_name)
         if not vgroup:
@@ -245,12 +240,249 @@ class WPT_OT_MirrorWeights(bpy.types.Operator):
             except RuntimeError:
                 continue
 
-        for dst_idx, weights in dst_weights.items():
-            avg_weight = sum(weights) / len(weights)
+        for dst_idx, ws in dst_weights.items():
+            avg_weight = sum(ws) / len(ws)
             if avg_weight > 0:
                 opp_vgroup.add([dst_idx], avg_weight, 'REPLACE')
 
 
+class WPT_OT_TransferWeights(bpy.types.Operator):
+    """Project the source mesh's weights onto the active mesh"""
+    bl_idname = "wpt.transfer_weights"
+    bl_label = "Transfer Weights"
+    bl_description = ("Copy weights from the source mesh: each vertex takes the interpolated "
+                      "weights of the closest point on the source surface")
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        src = context.scene.wpt_transfer.source
+        return (obj is not None and obj.type == 'MESH'
+                and src is not None and src != obj
+                and context.mode in {'OBJECT', 'PAINT_WEIGHT'})
+
+    def execute(self, context):
+        obj = context.active_object
+        tr = context.scene.wpt_transfer
+        src = tr.source
+        if not src.vertex_groups:
+            self.report({'WARNING'}, f"{src.name} has no vertex groups")
+            return {'CANCELLED'}
+        prev_mode = obj.mode
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            bpy.ops.object.mode_set(mode='OBJECT')
+            index = transfer.SourceIndex(src)
+            if not len(index.tris):
+                self.report({'WARNING'}, f"{src.name} has no faces to project onto")
+                return {'CANCELLED'}
+            tri, bary, hit = index.project(
+                transfer.world_coords(obj), tr.max_distance,
+                progress=lambda done, total: wm.progress_update(100 * done // max(total, 1)))
+            table = index.interpolate(tri, bary, hit)
+            table = transfer.keep_missed(table, weights.read_weight_table(obj), hit)
+            written = weight_history.apply_table(obj, table, f"Transfer from {src.name}", tr.replace_all)
+        except Exception as e:
+            self.report({'ERROR'}, f"Failed to transfer weights: {e}")
+            return {'CANCELLED'}
+        finally:
+            wm.progress_end()
+            try:
+                bpy.ops.object.mode_set(mode=prev_mode)
+            except Exception:
+                pass
+        missed = int(len(hit) - hit.sum())
+        msg = f"Transferred weights from {src.name} ({written} values)"
+        if missed:
+            msg += f", {missed} verts out of range"
+        self.report({'INFO'}, msg)
+        return {'FINISHED'}
+
+
+_LOD_SUFFIX = re.compile(r'^(.*?)[_.\- ]?lod\d+$', re.IGNORECASE)
+
+
+def _lod_chain(context, source, rig):
+    """Other meshes deformed by `rig` that belong to `source`'s LOD chain.
+
+    Only meshes sharing the source's base name with another LOD suffix
+    ("Body_LOD0" -> "Body_LOD1", "Body.lod2") count. Returns None if the
+    source itself isn't LOD-named.
+    """
+    match = _LOD_SUFFIX.match(source.name)
+    if match is None:
+        return None
+    base = match.group(1).lower()
+    chain = []
+    for ob in context.scene.objects:
+        if ob == source or ob.type != 'MESH':
+            continue
+        if keymaps._wpt_find_rig_for_mesh(ob) != rig:
+            continue
+        m = _LOD_SUFFIX.match(ob.name)
+        if m and m.group(1).lower() == base:
+            chain.append(ob)
+    return sorted(chain, key=lambda ob: ob.name)
+
+
+class WPT_OT_PropagateLODWeights(bpy.types.Operator):
+    """Transfer the active mesh's weights onto every other LOD of its rig"""
+    bl_idname = "wpt.propagate_lod_weights"
+    bl_label = "Propagate to LODs"
+    bl_description = ("Use the active mesh as LOD0: transfer its weights onto the other LOD meshes "
+                      "of the same rig, then clean, limit and normalize them")
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj is not None and obj.type == 'MESH'
+                and len(obj.vertex_groups) > 0
+                and context.mode in {'OBJECT', 'PAINT_WEIGHT'})
+
+    def execute(self, context):
+        obj = context.active_object
+        tr = context.scene.wpt_transfer
+        rig = keymaps._wpt_find_rig_for_mesh(obj)
+        if rig is None:
+            self.report({'WARNING'}, f"{obj.name} is not deformed by an armature")
+            return {'CANCELLED'}
+        targets = _lod_chain(context, obj, rig)
+        if targets is None:
+            self.report({'WARNING'}, f"{obj.name} is not part of an LOD chain (name it e.g. '{obj.name}_LOD0')")
+            return {'CANCELLED'}
+        if not targets:
+            self.report({'WARNING'}, f"No other LOD meshes found for {rig.name}")
+            return {'CANCELLED'}
+
+        prev_mode = obj.mode
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            bpy.ops.object.mode_set(mode='OBJECT')
+            index = transfer.SourceIndex(obj)
+            if not len(index.tris):
+                self.report({'WARNING'}, f"{obj.name} has no faces to project onto")
+                return {'CANCELLED'}
+            deform = {b.name for b in rig.data.bones if b.use_deform}
+            subset = np.array([name in deform for name in index.table.group_names], dtype=bool)
+
+            # Projection and all bpy reads stay on the main thread.
+            jobs = []
+            for i, target in enumerate(targets):
+                tri, bary, hit = index.project(
+                    transfer.world_coords(target), tr.max_distance,
+                    progress=lambda done, total, i=i: wm.progress_update(
+                        80 * (i + done / max(total, 1)) // len(targets)))
+                jobs.append((tri, bary, hit, weights.read_weight_table(target)))
+
+            # Settings are RNA properties too: copy them before entering the pool.
+            clean_threshold, max_influences, normalize = tr.clean_threshold, tr.max_influences, tr.normalize
+
+            def finish(job):
+                tri, bary, hit, current = job
+                table = weights.prune_table(index.interpolate(tri, bary, hit), clean_threshold,
+                                            max_influences, normalize, subset)
+                return transfer.keep_missed(table, current, hit)
+
+            # Interpolation and cleanup are NumPy-bound and release the GIL.
+            with ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as pool:
+                tables = list(pool.map(finish, jobs))
+            wm.progress_update(90)
+
+            written = 0
+            for target, table in zip(targets, tables):
+                written += weight_history.apply_table(target, table, f"LOD transfer from {obj.name}",
+                                                      tr.replace_all)
+        except Exception as e:
+            self.report({'ERROR'}, f"Failed to propagate weights: {e}")
+            return {'CANCELLED'}
+        finally:
+            wm.progress_end()
+            try:
+                bpy.ops.object.mode_set(mode=prev_mode)
+            except Exception:
+                pass
+        self.report({'INFO'}, f"Propagated weights to {len(targets)} LOD(s) ({written} values)")
+        return {'FINISHED'}
+
+
+class WPT_OT_BoneDistanceWeights(bpy.types.Operator):
+    """Initialise weights from the distance of each vertex to the deform bones"""
+    bl_idname = "wpt.bone_distance_weights"
+    bl_label = "Weights from Bone Distance"
+    bl_description = ("First-pass weights from geometry: each vertex is weighted to its nearest "
+                      "deform bone segments, normalized, into groups named after the bones")
+    bl_options = {"REGISTER", "UNDO"}
+
+    max_influences: bpy.props.IntProperty(
+        name="Max Influences",
+        description="Nearest bones kept per vertex",
+        default=4, min=1, max=16,
+    )
+    falloff: bpy.props.EnumProperty(
+        name="Falloff",
+        items=[
+            ('INVERSE', "Inverse Distance", "Weight by (nearest distance / distance) ^ power"),
+            ('GAUSSIAN', "Gaussian", "Fade out bones farther than the nearest one by a few radii"),
+        ],
+        default='INVERSE',
+    )
+    power: bpy.props.FloatProperty(
+        name="Power",
+        description="Inverse distance exponent; higher gives harder transitions",
+        default=4.0, min=0.1, soft_max=16.0,
+    )
+    radius: bpy.props.FloatProperty(
+        name="Radius",
+        description="Gaussian falloff width",
+        default=0.05, min=1e-4, soft_max=1.0,
+        subtype='DISTANCE',
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj is not None and obj.type == 'MESH'
+                and context.mode in {'OBJECT', 'PAINT_WEIGHT'})
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "max_influences")
+        layout.prop(self, "falloff")
+        layout.prop(self, "radius" if self.falloff == 'GAUSSIAN' else "power")
+
+    def execute(self, context):
+        obj = context.active_object
+        rig = utils.find_armature_for_object(context)
+        if rig is None:
+            self.report({'WARNING'}, "No armature found")
+            return {'CANCELLED'}
+        names, heads, tails = bone_weights.deform_segments(rig)
+        if not names:
+            self.report({'WARNING'}, f"{rig.name} has no deform bones")
+            return {'CANCELLED'}
+        prev_mode = obj.mode
+        try:
+            bpy.ops.object.mode_set(mode='OBJECT')
+            table = bone_weights.distance_weights(
+                transfer.world_coords(obj), heads, tails, names,
+                self.max_influences, self.falloff, self.power, self.radius)
+            written = weight_history.apply_table(obj, table, "Bone Distance Weights", replace_all=False)
+        except Exception as e:
+            self.report({'ERROR'}, f"Failed to compute bone weights: {e}")
+            return {'CANCELLED'}
+        finally:
+            try:
+                bpy.ops.object.mode_set(mode=prev_mode)
+            except Exception:
+                pass
+        self.report({'INFO'}, f"Weighted {obj.name} to {len(names)} bone(s) of {rig.name} ({written} values)")
+        return {'FINISHED'}
+
+
 class WPT_OT_GradientAddSubtract(bpy.types.Operator):
     """Switch to gradient tool with add/subtract mode"""
     bl_idname = "wpt.gradient_add_subtract"
@@ -322,8 +554,11 @@ class WPT_OT_SmartSmoothWeights(bpy.types.Operator):
     Boundary-aware Laplacian: averages from all neighbors so smoothed verts
     blend cleanly into untouched ones. Optionally normalises per-vertex.
 
-    mode='SMOOTH'  → lerp each weight toward neighbour mean (Laplacian)
+    mode='SMOOTH'  → lerp each weight toward neighbour mean (Laplacian, or
+                     Taubin λ/μ when the settings ask for it)
     mode='SHARPEN' → push each weight away from neighbour mean (negative Laplacian, clamped)
+
+    Stops early once a pass changes no weight by more than the tolerance.
     """
     bl_idname = "wpt.smart_smooth"
     bl_label = "Smart Smooth"
@@ -355,7 +590,7 @@ class WPT_OT_SmartSmoothWeights(bpy.types.Operator):
             target_indices = self._collect_selected(obj, original_mode)
             if target_indices is None:
                 return {'CANCELLED'}
-            if not target_indices:
+            if not len(target_indices):
                 self.report({'WARNING'},
                             "Nothing selected — mask or select verts/faces, or turn off 'Selected Only'")
                 return {'CANCELLED'}
@@ -366,7 +601,7 @@ class WPT_OT_SmartSmoothWeights(bpy.types.Operator):
             bpy.ops.object.mode_set(mode='OBJECT')
 
         try:
-            n_modified = self._smooth(obj, target_indices, s)
+            n_modified, n_iters = self._smooth(obj, target_indices, s)
         finally:
             if original_mode == 'EDIT_MESH':
                 bpy.ops.object.mode_set(mode='EDIT')
@@ -377,9 +612,12 @@ class WPT_OT_SmartSmoothWeights(bpy.types.Operator):
             return {'CANCELLED'}
 
         scope = "active group" if s.only_active_group else "all unlocked groups"
-        norm = ", normalised" if s.normalize else ""
+        norm = ""
+        if s.normalize:
+            norm = ", normalised (locked kept)" if s.normalize_mode == 'LOCKED' else ", normalised"
         verb = "Sharpened" if self.mode == 'SHARPEN' else "Smoothed"
-        self.report({'INFO'}, f"{verb} {n_modified} vert(s), {s.iterations} iter, {scope}{norm}")
+        self.report({'INFO'},
+                    f"{verb} {n_modified} vert(s), {n_iters}/{s.iterations} iter, {scope}{norm}")
         return {'FINISHED'}
 
     def _collect_selected(self, obj, mode):
@@ -387,109 +625,292 @@ class WPT_OT_SmartSmoothWeights(bpy.types.Operator):
             try:
                 import bmesh
                 bm = bmesh.from_edit_mesh(obj.data)
-                return [v.index for v in bm.verts if v.select]
+                return np.array([v.index for v in bm.verts if v.select], dtype=np.int64)
             except Exception as e:
                 self.report({'ERROR'}, f"bmesh access failed: {e}")
                 return None
 
         # Weight Paint / Object mode: union of vertex selection and polygon selection.
-        selected = set()
-        mesh = obj.data
-        for v in mesh.vertices:
-            if v.select:
-                selected.add(v.index)
-        for poly in mesh.polygons:
-            if poly.select:
-                selected.update(poly.vertices)
-        return sorted(selected)
+        return weights.selected_vertex_indices(obj.data)
 
     def _smooth(self, obj, target_indices, s):
+        """Run the smoothing kernel on `target_indices`. Returns (n_modified, n_iterations)."""
         mesh = obj.data
         n_verts = len(mesh.vertices)
 
         if target_indices is None:
-            target_indices = list(range(n_verts))
+            target_indices = np.arange(n_verts)
 
         if s.only_active_group:
             active_idx = obj.vertex_groups.active_index
             if active_idx < 0:
                 self.report({'WARNING'}, "No active vertex group")
-                return -1
+                return -1, 0
             group_indices = [active_idx]
         else:
             group_indices = [i for i, g in enumerate(obj.vertex_groups) if not g.lock_weight]
 
         if not group_indices:
             self.report({'WARNING'}, "No unlocked vertex groups to smooth")
-            return -1
-        group_set = set(group_indices)
-
-        neighbors = [[] for _ in range(n_verts)]
-        for edge in mesh.edges:
-            v0, v1 = edge.vertices
-            neighbors[v0].append(v1)
-            neighbors[v1].append(v0)
-
-        current = {gi: {} for gi in group_indices}
-        for v in mesh.vertices:
-            for vge in v.groups:
-                if vge.group in group_set:
-                    current[vge.group][v.index] = vge.weight
-
-        eps = 1e-5
-        strength = s.strength
+            return -1, 0
+
+        op = weights.smoothing_operator(mesh, s.weighting)
+        table = weights.read_weight_table(obj)
+
+        selected = target_indices
+        if s.symmetric:
+            mirror = weights.mirror_vertex_map(mesh, s.symmetry_axis)
+            mirrored = mirror[target_indices]
+            target_indices = np.union1d(target_indices, mirrored[mirrored >= 0])
+
+        # Only groups present on the targets or their one-ring can change, so
+        # the dense block is built for those columns alone. Coarse levels reach
+        # further than one ring, so they consider every group on the mesh.
+        region = np.zeros(n_verts, dtype=bool)
+        if s.levels > 0:
+            region[:] = True
+        else:
+            region[target_indices] = True
+            region[op.take_rows(target_indices).indices] = True
+        cols = np.intersect1d(table.groups_in(region), group_indices)
+        if not len(cols):
+            return len(target_indices), 0
+
+        eps = weights.WEIGHT_EPS
         sign = -1.0 if self.mode == 'SHARPEN' else 1.0
+        kwargs = dict(sign=sign, method=s.method, pass_band=s.pass_band, tolerance=s.tolerance,
+                      active_eps=s.active_threshold if s.incremental else 0.0)
+        smooth_targets = target_indices
+
+        if s.symmetric:
+            cols, perm = self._mirror_columns(obj, cols)
+            smooth_targets, on_step = self._mirror_setup(mesh, mirror, target_indices, selected, perm,
+                                                         s.symmetry_axis)
+            kwargs['on_step'] = on_step
+
+        # Preserve-locked normalisation also rescales unlocked groups that
+        # aren't being smoothed (Active Group Only); they ride along as extra
+        # columns after the smoothed ones.
+        locked_total = None
+        n_smoothed = len(cols)
+        if s.normalize and s.normalize_mode == 'LOCKED':
+            vgroups = obj.vertex_groups
+            locked = [i for i, g in enumerate(vgroups) if g.lock_weight and i not in cols]
+            locked_total = table.totals(locked)[target_indices]
+            target_mask = np.zeros(n_verts, dtype=bool)
+            target_mask[target_indices] = True
+            extra = np.setdiff1d(table.groups_in(target_mask), np.concatenate((cols, locked)))
+            cols = np.concatenate((cols, extra))
+
+        block = table.dense(cols)
+        old = block[target_indices]
+        smooth_block = block[:, :n_smoothed]
+
+        if s.levels > 0:
+            hierarchy = weights.vertex_hierarchy(mesh, s.levels)
+            n_iters = smoothing.smooth_multires(
+                smooth_block, op, hierarchy, smooth_targets, s.iterations, s.strength, **kwargs)
+        else:
+            n_iters = smoothing.smooth(smooth_block, op, smooth_targets, s.iterations, s.strength, **kwargs)
 
-        for _ in range(s.iterations):
-            updates = []
-            for vidx in target_indices:
-                nbrs = neighbors[vidx]
-                if not nbrs:
-                    continue
-                inv_n = 1.0 / len(nbrs)
-                for gi in group_indices:
-                    cur_w = current[gi].get(vidx, 0.0)
-                    nbr_sum = 0.0
-                    cg = current[gi]
-                    for n in nbrs:
-                        nbr_sum += cg.get(n, 0.0)
-                    avg = nbr_sum * inv_n
-                    new_w = cur_w + (avg - cur_w) * strength * sign
-                    if new_w < 0.0:
-                        new_w = 0.0
-                    elif new_w > 1.0:
-                        new_w = 1.0
-                    updates.append((gi, vidx, new_w))
-            for gi, vidx, w in updates:
-                if w > eps:
-                    current[gi][vidx] = w
-                elif vidx in current[gi]:
-                    del current[gi][vidx]
+        if s.normalize:
+            smoothing.normalize_rows(block, target_indices, eps, locked_total)
+
+        new = block[target_indices]
+        weights.write_dense_changes(obj, cols, target_indices, old, new, eps)
+        label = "Sharpen" if self.mode == 'SHARPEN' else "Smart Smooth"
+        weight_history.record_block(obj, label, cols, target_indices, old, new, eps)
+        return len(target_indices), n_iters
+
+    def _mirror_columns(self, obj, cols):
+        """Add each column's flipped twin group (created if missing, and reported).
+
+        Groups whose twin is locked are dropped, since their mirror can't be written.
+
+        Returns (columns, perm) where perm[i] is the column holding the twin of
+        column i (itself for unsided groups).
+        """
+        vgroups = obj.vertex_groups
+        all_cols = set(int(c) for c in cols)
+        twin = {}
+        created = []
+        for gi in list(all_cols):
+            name = vgroups[gi].name
+            opp_name = flip_name(name)
+            if opp_name == name:
+                continue
+            opp = vgroups.get(opp_name)
+            if opp is None:
+                opp = vgroups.new(name=opp_name)
+                created.append(opp_name)
+            if opp.lock_weight:
+                # Can't mirror into a locked twin — leave the pair alone.
+                all_cols.discard(gi)
+                continue
+            twin[gi] = opp.index
+            twin[opp.index] = gi
+            all_cols.add(opp.index)
+        if created:
+            self.report({'INFO'}, f"Created mirror group(s): {', '.join(sorted(created))}")
+        cols = np.array(sorted(all_cols), dtype=np.int64)
+        pos = {gi: i for i, gi in enumerate(cols.tolist())}
+        perm = np.array([pos[twin.get(gi, gi)] for gi in cols.tolist()], dtype=np.int64)
+        return cols, perm
+
+    def _mirror_setup(self, mesh, mirror, target_indices, selected, perm, axis):
+        """Split symmetric targets into the half that is smoothed and its mirror image.
+
+        The source half is the side of `axis` holding most of the `selected`
+        verts (the + side on a tie), so smoothing follows where the user worked.
+
+        Returns (rows to smooth, on_step callback writing the other half).
+        """
+        coords = weights.vertex_coords(mesh)[:, 'XYZ'.find(axis)]
+        sel_side = coords[selected]
+        if (sel_side < 0.0).sum() > (sel_side > 0.0).sum():
+            coords = -coords
+        side = coords[target_indices]
+        mirrored = mirror[target_indices]
+        center = target_indices[mirrored == target_indices]
+        src_mask = (side > 0.0) & (mirrored >= 0) & (mirrored != target_indices)
+        src = target_indices[src_mask]
+        dst = mirrored[src_mask]
+        # Targets with no mirror partner are smoothed on their own.
+        lonely = target_indices[mirrored < 0]
+        smooth_targets = np.union1d(np.union1d(src, center), lonely)
+        return smooth_targets, smoothing.mirror_step(src, dst, perm, center)
+
+
+class WPT_OT_HeatFillWeights(bpy.types.Operator):
+    """Fill selected vertices by heat diffusion from the surrounding weights.
+
+    Selected verts are unknowns, everything else is a fixed boundary. One
+    sparse solve gives the converged result Smart Smooth would only reach
+    after hundreds of iterations, so large unweighted holes fill in one go.
+    """
+    bl_idname = "wpt.heat_fill"
+    bl_label = "Heat Fill"
+    bl_description = ("Solve selected vertices' weights from the surrounding unselected ones "
+                      "(harmonic fill, all unlocked groups at once)")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Relative residual at which the solver stops",
+        default=1e-5, min=1e-9, max=1e-1, precision=6,
+    )
+    max_iterations: bpy.props.IntProperty(
+        name="Max Iterations",
+        description="Upper bound on conjugate-gradient iterations",
+        default=1000, min=1, max=100000,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj is not None
+                and obj.type == 'MESH'
+                and len(obj.vertex_groups) > 0)
+
+    def execute(self, context):
+        obj = context.active_object
+        s = context.scene.wpt_smooth
+        original_mode = context.mode
+        if original_mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        try:
+            result = self._fill(obj, s)
+        finally:
+            if original_mode == 'EDIT_MESH':
+                bpy.ops.object.mode_set(mode='EDIT')
+            elif original_mode == 'PAINT_WEIGHT':
+                bpy.ops.object.mode_set(mode='WEIGHT_PAINT')
+        if result is None:
+            return {'CANCELLED'}
+        n_filled, n_iters = result
+        self.report({'INFO'}, f"Filled {n_filled} vert(s) in {n_iters} solver iteration(s)")
+        return {'FINISHED'}
 
+    def _fill(self, obj, s):
+        mesh = obj.data
+        n_verts = len(mesh.vertices)
+        unknowns = weights.selected_vertex_indices(mesh)
+        if not len(unknowns):
+            self.report({'WARNING'}, "Nothing selected — select the verts to fill")
+            return None
+        if len(unknowns) == n_verts:
+            self.report({'WARNING'}, "Everything is selected — leave some verts as boundary")
+            return None
+
+        vgroups = obj.vertex_groups
+        adj = weights.neighbour_weights(mesh, s.weighting)
+        table = weights.read_weight_table(obj)
+        region = np.zeros(n_verts, dtype=bool)
+        region[unknowns] = True
+        region[adj.take_rows(unknowns).indices] = True
+        unlocked = [i for i, g in enumerate(vgroups) if not g.lock_weight]
+        cols = np.intersect1d(table.groups_in(region), unlocked)
+        if not len(cols):
+            self.report({'WARNING'}, "No unlocked weights around the selection to fill from")
+            return None
+
+        block = table.dense(cols)
+        old = block[unknowns]
+        n_iters = smoothing.harmonic_fill(block, adj, unknowns, self.tolerance, self.max_iterations)
         if s.normalize:
-            for vidx in target_indices:
-                total = 0.0
-                for gi in group_indices:
-                    total += current[gi].get(vidx, 0.0)
-                if total > eps and abs(total - 1.0) > eps:
-                    inv_t = 1.0 / total
-                    for gi in group_indices:
-                        if vidx in current[gi]:
-                            current[gi][vidx] *= inv_t
-
-        for gi in group_indices:
-            vg = obj.vertex_groups[gi]
-            for vidx in target_indices:
-                w = current[gi].get(vidx, 0.0)
-                if w > eps:
-                    vg.add([vidx], w, 'REPLACE')
-                else:
-                    try:
-                        vg.remove([vidx])
-                    except RuntimeError:
-                        pass
-
-        return len(target_indices)
+            locked_total = None
+            if s.normalize_mode == 'LOCKED':
+                locked = [i for i, g in enumerate(vgroups) if g.lock_weight]
+                locked_total = table.totals(locked)[unknowns]
+            smoothing.normalize_rows(block, unknowns, weights.WEIGHT_EPS, locked_total)
+
+        new = block[unknowns]
+        weights.write_dense_changes(obj, cols, unknowns, old, new)
+        weight_history.record_block(obj, "Heat Fill", cols, unknowns, old, new)
+        return len(unknowns), n_iters
+
+
+class WPT_OT_CleanupWeights(bpy.types.Operator):
+    """Run one of Blender's vertex-group cleanup ops and record it in the weight history"""
+    bl_idname = "wpt.cleanup_weights"
+    bl_label = "Cleanup Weights"
+    bl_description = "Normalize, limit or clean vertex group weights (recorded in the weight history)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    action: bpy.props.EnumProperty(
+        name="Action",
+        items=[
+            ('NORMALIZE_ALL', "Normalize All", "Normalize all vertex groups (locked groups kept)"),
+            ('LIMIT_TOTAL', "Limit Total", "Limit the number of influences per vertex"),
+            ('CLEAN', "Clean Zero", "Remove zero weights from vertex groups"),
+        ],
+        default='NORMALIZE_ALL',
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj is not None
+                and obj.type == 'MESH'
+                and len(obj.vertex_groups) > 0
+                and context.mode != 'EDIT_MESH')
+
+    def execute(self, context):
+        obj = context.active_object
+        before = weights.read_weight_table(obj)
+        try:
+            if self.action == 'NORMALIZE_ALL':
+                bpy.ops.object.vertex_group_normalize_all()
+            elif self.action == 'LIMIT_TOTAL':
+                bpy.ops.object.vertex_group_limit_total()
+            else:
+                bpy.ops.object.vertex_group_clean()
+        except RuntimeError as e:
+            self.report({'ERROR'}, f"Cleanup failed: {e}")
+            return {'CANCELLED'}
+        label = self.bl_rna.properties['action'].enum_items[self.action].name
+        weight_history.record_tables(obj, label, before, weights.read_weight_table(obj))
+        return {'FINISHED'}
 
 
 class WPT_OT_SetBrushWeight(bpy.types.Operator):
@@ -532,15 +953,139 @@ class WPT_OT_SelectBone(bpy.types.Operator):
         return {'FINISHED'}
 
 
+def _set_vertex_mask(context, obj, mask):
+    """Make `mask` the vertex selection of `obj` (Object mode round-trip) and turn on the paint mask."""
+    original_mode = context.mode
+    if original_mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    try:
+        weights.select_vertices(obj.data, np.flatnonzero(mask))
+    finally:
+        if original_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+        elif original_mode == 'PAINT_WEIGHT':
+            bpy.ops.object.mode_set(mode='WEIGHT_PAINT')
+    if context.mode == 'PAINT_WEIGHT':
+        obj.data.use_paint_mask_vertex = True
+
+
+class WPT_OT_SelectByInfluence(bpy.types.Operator):
+    """Select the verts the selected bones influence above a threshold"""
+    bl_idname = "wpt.select_by_influence"
+    bl_label = "Select by Influence"
+    bl_description = ("Select every vertex whose weight in a selected bone's group exceeds the threshold, "
+                      "optionally grown or shrunk by a number of edge rings")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    threshold: bpy.props.FloatProperty(
+        name="Threshold",
+        description="Minimum weight for a vertex to count as influenced",
+        default=0.1, min=0.0, max=1.0,
+    )
+    grow: bpy.props.IntProperty(
+        name="Grow",
+        description="Edge rings to grow (positive) or shrink (negative) the result by",
+        default=0, min=-100, max=100,
+    )
+    extend: bpy.props.BoolProperty(
+        name="Extend",
+        description="Add to the current selection instead of replacing it",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj is not None
+                and obj.type == 'MESH'
+                and len(obj.vertex_groups) > 0
+                and context.mode != 'EDIT_MESH')
+
+    def execute(self, context):
+        obj = context.active_object
+        mesh = obj.data
+        rig = keymaps._wpt_find_rig_for_mesh(obj)
+        if rig is None:
+            self.report({'WARNING'}, f"{obj.name} is not deformed by an armature")
+            return {'CANCELLED'}
+        bones = {b.name for b in rig.data.bones if b.select}
+        if not bones and rig.data.bones.active is not None:
+            bones = {rig.data.bones.active.name}
+        cols = [vg.index for vg in obj.vertex_groups if vg.name in bones]
+        if not cols:
+            self.report({'WARNING'}, "No vertex group matches the selected bones")
+            return {'CANCELLED'}
+
+        table = weights.read_weight_table(obj)
+        hit = np.isin(table.groups, cols) & (table.weights > max(self.threshold, weights.WEIGHT_EPS))
+        mask = np.zeros(table.n_verts, dtype=bool)
+        mask[table.rows()[hit]] = True
+        if self.grow:
+            mask = weights.grow_mask(weights.mesh_adjacency(mesh), mask, self.grow)
+        if self.extend:
+            mask[weights.selected_vertex_indices(mesh)] = True
+        _set_vertex_mask(context, obj, mask)
+        self.report({'INFO'}, f"Selected {int(mask.sum())} vert(s) from {len(cols)} group(s)")
+        return {'FINISHED'}
+
+
+class WPT_OT_GrowSelection(bpy.types.Operator):
+    """Grow or shrink the vertex selection by whole edge rings"""
+    bl_idname = "wpt.grow_selection"
+    bl_label = "Grow / Shrink Selection"
+    bl_description = "Grow (positive) or shrink (negative) the vertex selection along mesh edges"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    steps: bpy.props.IntProperty(
+        name="Steps",
+        description="Edge rings to add (positive) or remove (negative)",
+        default=1, min=-100, max=100,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH' and context.mode != 'EDIT_MESH'
+
+    def execute(self, context):
+        obj = context.active_object
+        mesh = obj.data
+        mask = np.zeros(len(mesh.vertices), dtype=bool)
+        mask[weights.selected_vertex_indices(mesh)] = True
+        if not mask.any():
+            self.report({'WARNING'}, "Nothing selected")
+            return {'CANCELLED'}
+        _set_vertex_mask(context, obj, weights.grow_mask(weights.mesh_adjacency(mesh), mask, self.steps))
+        return {'FINISHED'}
+
+
 classes = (
     WPT_OT_SetBrushMode,
     WPT_OT_SetupWeightPaint,
     WPT_OT_SwitchTool,
     WPT_OT_QuickSwitchMesh,
     WPT_OT_MirrorWeights,
+    WPT_OT_TransferWeights,
+    WPT_OT_PropagateLODWeights,
+    WPT_OT_BoneDistanceWeights,
     WPT_OT_GradientAddSubtract,
     WPT_OT_FloodSmooth,
     WPT_OT_SmartSmoothWeights,
+    WPT_OT_HeatFillWeights,
+    WPT_OT_CleanupWeights,
     WPT_OT_SetBrushWeight,
     WPT_OT_SelectBone,
+    WPT_OT_SelectByInfluence,
+    WPT_OT_GrowSelection,
+)
+
+
+weight_history.register_history_operators(
+    WPT_OT_MirrorWeights,
+    WPT_OT_TransferWeights,
+    WPT_OT_PropagateLODWeights,
+    WPT_OT_BoneDistanceWeights,
+    WPT_OT_SmartSmoothWeights,
+    WPT_OT_HeatFillWeights,
+    WPT_OT_CleanupWeights,
 )
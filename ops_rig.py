@@ -3,18 +3,31 @@
 import json
 
 import bpy
-from bpy.props import StringProperty
+import numpy as np
+from bpy.props import EnumProperty, StringProperty
 
-from . import utils
+from . import keymaps, utils, weights
 
 
 class WPT_OT_ToggleDeformBones(bpy.types.Operator):
-    """Show only deform bones (DEF/Deform collections, with name fallback)"""
+    """Show only deform bones (DEF/Deform collections, with name fallback) or only the bones weighting the mesh"""
     bl_idname = "wpt.toggle_deform_bones"
     bl_label = "Deform Bones Only"
-    bl_description = "Show only deform bones (DEF/deform) in the active armature"
+    bl_description = ("Show only deform bones (DEF/deform) in the active armature, or only the bones "
+                      "whose vertex groups carry weight on the mesh or its selected verts")
     bl_options = {"REGISTER", "UNDO"}
 
+    mode: EnumProperty(
+        name="Mode",
+        items=[
+            ('NAMES', "Deform", "DEF/Deform bone collections, or bone names containing DEF/deform"),
+            ('INFLUENCE', "Influencing", "Bones weighting the active mesh (every mesh of the rig when the "
+                                         "armature is active)"),
+            ('SELECTION', "Selection", "Bones weighting the selected verts of the active mesh"),
+        ],
+        default='NAMES',
+    )
+
     def execute(self, context):
         armature_obj = utils.find_armature_for_object(context)
         if not armature_obj:
@@ -22,6 +35,8 @@ class WPT_OT_ToggleDeformBones(bpy.types.Operator):
             return {'CANCELLED'}
 
         arm = armature_obj.data
+        if self.mode != 'NAMES':
+            return self._show_influencing(context, armature_obj)
         collections = getattr(arm, "collections_all", None)
         if collections:
             for col in collections:
@@ -40,6 +55,43 @@ class WPT_OT_ToggleDeformBones(bpy.types.Operator):
                 bone.hide = not any(keyword in bone.name for keyword in deform_keywords)
         return {'FINISHED'}
 
+    def _show_influencing(self, context, armature_obj):
+        obj = context.active_object
+        if obj is not None and obj.type == 'MESH':
+            meshes = [obj]
+        elif self.mode == 'INFLUENCE':
+            meshes = [ob for ob in context.scene.objects
+                      if ob.type == 'MESH' and keymaps._wpt_find_rig_for_mesh(ob) == armature_obj]
+        else:
+            meshes = []
+        if not meshes:
+            self.report({'WARNING'}, "No mesh to read weights from")
+            return {'CANCELLED'}
+        if context.mode == 'EDIT_MESH':
+            obj.update_from_editmode()
+
+        used = set()
+        for ob in meshes:
+            table = weights.read_weight_table(ob)
+            mask = np.ones(table.n_verts, dtype=bool)
+            if self.mode == 'SELECTION':
+                mask[:] = False
+                mask[weights.selected_vertex_indices(ob.data)] = True
+                if not mask.any():
+                    self.report({'WARNING'}, "No verts selected")
+                    return {'CANCELLED'}
+            used.update(table.group_names[gi] for gi in table.groups_in(mask).tolist())
+
+        arm = armature_obj.data
+        # Per-bone hide only shows through visible collections.
+        for col in getattr(arm, "collections_all", ()):
+            col.is_visible = True
+        hide = np.array([bone.name not in used for bone in arm.bones], dtype=bool)
+        arm.bones.foreach_set('hide', hide)
+        armature_obj.update_tag()
+        self.report({'INFO'}, f"Showing {int((~hide).sum())} influencing bone(s)")
+        return {'FINISHED'}
+
 
 class WPT_OT_ShowAllBones(bpy.types.Operator):
     """Show controller and deform bone collections"""
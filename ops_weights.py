@@ -0,0 +1,561 @@
+"""Weight data operators for My Simp: weight-only history, weight layers and weight files."""
+
+import os
+
+import bpy
+import numpy as np
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from . import analysis, keymaps, remap, weight_history, weight_io, weights
+
+# ID property on the mesh data holding the named weight layers.
+LAYERS_KEY = "wpt_weight_layers"
+
+# Point attribute holding the per-vertex largest change of the last weight diff.
+DIFF_ATTRIBUTE = "wpt_weight_diff"
+
+
+# ===== Weight layer storage =====
+# Each layer is a packed sparse copy of the whole weight table:
+#   {"n_verts": int, "group_names": [str], "verts": int[], "groups": int[], "weights": float[]}
+
+def _id_array(values, dtype):
+    """Hand a NumPy array to an ID property (buffer fast path, list fallback)."""
+    arr = np.ascontiguousarray(values, dtype=dtype)
+    return arr if len(arr) else []
+
+
+def _np_array(prop, dtype):
+    return np.asarray(prop).astype(dtype, copy=False) if len(prop) else np.zeros(0, dtype=dtype)
+
+
+def layer_names(mesh):
+    store = mesh.get(LAYERS_KEY)
+    return list(store.keys()) if store is not None else []
+
+
+def store_layer(mesh, name, table):
+    store = mesh.get(LAYERS_KEY)
+    if store is None:
+        mesh[LAYERS_KEY] = {}
+        store = mesh[LAYERS_KEY]
+    layer = {
+        "n_verts": table.n_verts,
+        "group_names": list(table.group_names),
+        "verts": _id_array(table.rows(), np.int32),
+        "groups": _id_array(table.groups, np.int32),
+        "weights": _id_array(table.weights, np.float32),
+    }
+    try:
+        store[name] = layer
+    except TypeError:
+        # Older builds without buffer support for ID property arrays.
+        for key in ("verts", "groups", "weights"):
+            layer[key] = np.asarray(layer[key]).tolist()
+        store[name] = layer
+
+
+def load_layer(mesh, name):
+    """Return the stored layer as a WeightTable, or None if missing."""
+    store = mesh.get(LAYERS_KEY)
+    if store is None or name not in store:
+        return None
+    layer = store[name]
+    return weights.WeightTable.from_coo(
+        _np_array(layer["verts"], np.int64),
+        _np_array(layer["groups"], np.int32),
+        _np_array(layer["weights"], np.float32),
+        int(layer["n_verts"]),
+        list(layer["group_names"]),
+    )
+
+
+def _object_mode_call(context, fn):
+    """Run fn() outside Edit mode (vertex groups don't sync in it), restoring the mode after."""
+    original_mode = context.mode
+    if original_mode == 'EDIT_MESH':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    try:
+        return fn()
+    finally:
+        if original_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+
+
+class WPT_OT_WeightHistoryStep(bpy.types.Operator):
+    """Step backward or forward through the active mesh's weight-only history"""
+    bl_idname = "wpt.weight_history_step"
+    bl_label = "Weight History Step"
+    bl_description = "Undo or redo the last weight edit made by My Simp tools (without global undo)"
+    bl_options = {'REGISTER'}
+
+    redo: bpy.props.BoolProperty(name="Redo", default=False)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        obj = context.active_object
+        original_mode = context.mode
+        if original_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        try:
+            label = weight_history.step(obj, redo=self.redo)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        finally:
+            if original_mode == 'EDIT_MESH':
+                bpy.ops.object.mode_set(mode='EDIT')
+
+        verb = "Redo" if self.redo else "Undo"
+        if label is None:
+            self.report({'INFO'}, f"Nothing to {verb.lower()}")
+            return {'CANCELLED'}
+        obj.data.update()
+        self.report({'INFO'}, f"{verb}: {label}")
+        return {'FINISHED'}
+
+
+class WPT_OT_WeightHistoryClear(bpy.types.Operator):
+    """Free the active mesh's weight-only history"""
+    bl_idname = "wpt.weight_history_clear"
+    bl_label = "Clear Weight History"
+    bl_description = "Discard all weight history steps stored for the active mesh"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        weight_history.clear(context.active_object.data)
+        return {'FINISHED'}
+
+
+class WPT_OT_WeightLayerSnapshot(bpy.types.Operator):
+    """Store the active mesh's current weights as a named weight layer"""
+    bl_idname = "wpt.weight_layer_snapshot"
+    bl_label = "Snapshot Weight Layer"
+    bl_description = "Save every vertex group weight of the active mesh into a named layer (overwrites same name)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH' and len(obj.vertex_groups) > 0
+
+    def execute(self, context):
+        obj = context.active_object
+        name = context.scene.wpt_layers.layer_name.strip()
+        if not name:
+            self.report({'ERROR'}, "Enter a layer name")
+            return {'CANCELLED'}
+        table = _object_mode_call(context, lambda: weights.read_weight_table(obj))
+        store_layer(obj.data, name, table)
+        context.scene.wpt_layers.active_layer = name
+        self.report({'INFO'}, f"Stored layer '{name}': {len(table.weights)} weights, "
+                              f"{table.n_groups} groups")
+        return {'FINISHED'}
+
+
+class WPT_OT_WeightLayerApply(bpy.types.Operator):
+    """Swap a stored weight layer into the active mesh"""
+    bl_idname = "wpt.weight_layer_apply"
+    bl_label = "Apply Weight Layer"
+    bl_description = "Replace the active mesh's weights with the selected layer (recorded in the weight history)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH' and bool(layer_names(obj.data))
+
+    def execute(self, context):
+        obj = context.active_object
+        name = context.scene.wpt_layers.active_layer
+        table = load_layer(obj.data, name)
+        if table is None:
+            self.report({'WARNING'}, f"Layer '{name}' not found on '{obj.data.name}'")
+            return {'CANCELLED'}
+        if table.n_verts != len(obj.data.vertices):
+            self.report({'ERROR'}, f"Layer '{name}' was stored for {table.n_verts} verts, "
+                                   f"mesh has {len(obj.data.vertices)}")
+            return {'CANCELLED'}
+        n = _object_mode_call(
+            context, lambda: weight_history.apply_table(obj, table, f"Layer {name}"))
+        obj.data.update()
+        self.report({'INFO'}, f"Applied layer '{name}' ({n} weights changed)")
+        return {'FINISHED'}
+
+
+class WPT_OT_WeightLayerDelete(bpy.types.Operator):
+    """Delete the selected weight layer from the active mesh"""
+    bl_idname = "wpt.weight_layer_delete"
+    bl_label = "Delete Weight Layer"
+    bl_description = "Delete the selected weight layer"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH' and bool(layer_names(obj.data))
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+
+    def execute(self, context):
+        mesh = context.active_object.data
+        name = context.scene.wpt_layers.active_layer
+        store = mesh.get(LAYERS_KEY)
+        if store is None or name not in store:
+            self.report({'WARNING'}, f"Layer '{name}' not found")
+            return {'CANCELLED'}
+        del store[name]
+        self.report({'INFO'}, f"Deleted layer '{name}'")
+        return {'FINISHED'}
+
+
+def _selected_meshes(context):
+    meshes = [o for o in context.selected_objects if o.type == 'MESH']
+    obj = context.active_object
+    if obj and obj.type == 'MESH' and obj not in meshes:
+        meshes.append(obj)
+    return meshes
+
+
+class WPT_OT_ExportWeights(bpy.types.Operator, ExportHelper):
+    """Export vertex group weights of the selected meshes to a compact binary file"""
+    bl_idname = "wpt.export_weights"
+    bl_label = "Export Weights"
+    bl_description = "Write all vertex group weights of the selected meshes to a sparse .npz file"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".npz"
+    filter_glob: bpy.props.StringProperty(default="*.npz", options={'HIDDEN'})
+
+    precision: bpy.props.EnumProperty(
+        name="Precision",
+        items=[
+            ('FLOAT16', "Half (16-bit)", "Half-size file, ~0.0005 weight precision"),
+            ('FLOAT32', "Full (32-bit)", "Exact weights"),
+        ],
+        default='FLOAT16',
+    )
+    compress: bpy.props.BoolProperty(
+        name="Compress",
+        description="Deflate the archive (smaller file, but import can no longer memory-map it)",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return bool(_selected_meshes(context))
+
+    def execute(self, context):
+        meshes = [o for o in _selected_meshes(context) if o.vertex_groups]
+        if not meshes:
+            self.report({'WARNING'}, "No selected mesh has vertex groups")
+            return {'CANCELLED'}
+        tables = [_object_mode_call(context, lambda o=o: weights.read_weight_table(o)) for o in meshes]
+        try:
+            weight_io.save_weights(self.filepath, tables, [o.name for o in meshes],
+                                   precision=self.precision, compress=self.compress)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not write '{self.filepath}': {e}")
+            return {'CANCELLED'}
+        n_weights = sum(len(t.weights) for t in tables)
+        self.report({'INFO'}, f"Exported {len(meshes)} mesh(es), {n_weights} weights")
+        return {'FINISHED'}
+
+
+class WPT_OT_ExportSkinBuffers(bpy.types.Operator, ExportHelper):
+    """Export engine-ready skin buffers (top-K bone indices + unorm weights) of the selected meshes"""
+    bl_idname = "wpt.export_skin_buffers"
+    bl_label = "Export Skin Buffers"
+    bl_description = ("Write per-vertex top-K deform bone indices and quantized weights of each selected "
+                      "mesh to a packed .wskin file (one file per mesh)")
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".wskin"
+    filter_glob: bpy.props.StringProperty(default="*.wskin", options={'HIDDEN'})
+
+    influences: bpy.props.IntProperty(
+        name="Influences",
+        description="Bone influences stored per vertex",
+        default=4, min=1, max=8,
+    )
+    weight_format: bpy.props.EnumProperty(
+        name="Weights",
+        items=[
+            ('UNORM8', "unorm8", "One byte per weight"),
+            ('UNORM16', "unorm16", "Two bytes per weight"),
+        ],
+        default='UNORM8',
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return bool(_selected_meshes(context))
+
+    def execute(self, context):
+        meshes = [o for o in _selected_meshes(context) if keymaps._wpt_find_rig_for_mesh(o) is not None]
+        if not meshes:
+            self.report({'WARNING'}, "No selected mesh is deformed by an armature")
+            return {'CANCELLED'}
+        stem, ext = os.path.splitext(self.filepath)
+        weight_bytes = 1 if self.weight_format == 'UNORM8' else 2
+        unweighted = 0
+        for o in meshes:
+            rig = keymaps._wpt_find_rig_for_mesh(o)
+            bone_names = [b.name for b in rig.data.bones if b.use_deform]
+            table = _object_mode_call(context, lambda o=o: weights.read_weight_table(o))
+            indices, unorm, missing = weight_io.pack_skin(table, bone_names, self.influences, weight_bytes)
+            path = self.filepath if len(meshes) == 1 else f"{stem}_{bpy.path.clean_name(o.name)}{ext}"
+            try:
+                weight_io.save_skin_buffer(path, indices, unorm, bone_names)
+            except OSError as e:
+                self.report({'ERROR'}, f"Could not write '{path}': {e}")
+                return {'CANCELLED'}
+            unweighted += missing
+        msg = f"Exported skin buffers for {len(meshes)} mesh(es)"
+        if unweighted:
+            self.report({'WARNING'}, f"{msg}; {unweighted} vert(s) have no deform weights")
+        else:
+            self.report({'INFO'}, msg)
+        return {'FINISHED'}
+
+
+class WPT_OT_ImportWeights(bpy.types.Operator, ImportHelper):
+    """Import vertex group weights from a My Simp weight file onto the selected meshes"""
+    bl_idname = "wpt.import_weights"
+    bl_label = "Import Weights"
+    bl_description = "Read weights from a .npz weight file, matching meshes and groups by name"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".npz"
+    filter_glob: bpy.props.StringProperty(default="*.npz", options={'HIDDEN'})
+
+    replace_all: bpy.props.BoolProperty(
+        name="Replace All Groups",
+        description="Also clear groups that are not in the file (otherwise they are left as they are)",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return bool(_selected_meshes(context))
+
+    def execute(self, context):
+        try:
+            archive = weight_io.WeightArchive(self.filepath)
+        except (OSError, KeyError, ValueError) as e:
+            self.report({'ERROR'}, f"Not a valid weight file: {e}")
+            return {'CANCELLED'}
+
+        imported, skipped = [], []
+        with archive:
+            meshes = _selected_meshes(context)
+            for obj in meshes:
+                index = archive.index_of(obj.name)
+                # A single-mesh file is applied to a single selected mesh whatever its name.
+                if index is None and len(archive.object_names) == 1 and len(meshes) == 1:
+                    index = 0
+                if index is None:
+                    skipped.append(obj.name)
+                    continue
+                table = archive.table(index)
+                if table.n_verts != len(obj.data.vertices):
+                    skipped.append(f"{obj.name} (vertex count)")
+                    continue
+                _object_mode_call(context, lambda: weight_history.apply_table(
+                    obj, table, "Import Weights", replace_all=self.replace_all))
+                obj.data.update()
+                imported.append(obj.name)
+
+        if not imported:
+            self.report({'WARNING'}, f"Nothing imported; no match for: {', '.join(skipped)}")
+            return {'CANCELLED'}
+        note = f" (skipped: {', '.join(skipped)})" if skipped else ""
+        self.report({'INFO'}, f"Imported weights onto {len(imported)} mesh(es){note}")
+        return {'FINISHED'}
+
+
+class WPT_OT_RemapGroups(bpy.types.Operator):
+    """Rename, merge, split or drop vertex groups of the selected meshes from a remap table"""
+    bl_idname = "wpt.remap_groups"
+    bl_label = "Remap Groups"
+    bl_description = ("Apply the remap table text block ('source > target [factor]' per line) to every "
+                      "selected mesh in one pass, e.g. to convert weights between rig naming conventions")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return bool(_selected_meshes(context)) and context.scene.wpt_groups.remap_text is not None
+
+    def execute(self, context):
+        props = context.scene.wpt_groups
+        try:
+            rules = remap.parse_rules(props.remap_text.as_string().splitlines())
+        except ValueError as e:
+            self.report({'ERROR'}, f"{props.remap_text.name}: {e}")
+            return {'CANCELLED'}
+        if not rules:
+            self.report({'WARNING'}, f"{props.remap_text.name} has no rules")
+            return {'CANCELLED'}
+
+        changed, n_mapped, n_removed = 0, 0, 0
+        for obj in _selected_meshes(context):
+            table = _object_mode_call(context, lambda o=obj: weights.read_weight_table(o))
+            mapping = remap.resolve(rules, table.group_names)
+            if not mapping:
+                continue
+            rig = keymaps._wpt_find_rig_for_mesh(obj)
+            subset = None
+            if rig is not None:
+                # Normalize over the rig's deform bones plus whatever the rules
+                # produce (the rig may not be converted yet).
+                subset = {b.name for b in rig.data.bones if b.use_deform}
+                subset.update(target for targets in mapping.values() for target, _f in targets)
+            result, mapped = remap.remap_table(table, mapping, props.remap_normalize, subset)
+
+            _object_mode_call(context, lambda o=obj: weight_history.apply_table(o, result, "Remap Groups"))
+            vgroups = obj.vertex_groups
+            for name in result.group_names:
+                if vgroups.get(name) is None:
+                    vgroups.new(name=name)
+            if props.remap_remove_sources:
+                targets = set(result.group_names)
+                for gi in mapped.tolist():
+                    name = table.group_names[gi]
+                    vg = vgroups.get(name)
+                    if name not in targets and vg is not None:
+                        vgroups.remove(vg)
+                        n_removed += 1
+            obj.data.update()
+            changed += 1
+            n_mapped += len(mapped)
+
+        if not changed:
+            self.report({'WARNING'}, "No rule matches a vertex group of the selected meshes")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Remapped {n_mapped} group(s) on {changed} mesh(es), removed {n_removed}")
+        return {'FINISHED'}
+
+
+# ===== Weight diff =====
+
+def _show_diff(op, context, obj, reference, label):
+    """Diff `obj`'s current weights against `reference`, store the report and the attribute."""
+    mesh = obj.data
+    if reference.n_verts != len(mesh.vertices):
+        op.report({'ERROR'}, f"{label} has {reference.n_verts} verts, {obj.name} has {len(mesh.vertices)}")
+        return {'CANCELLED'}
+    current = _object_mode_call(context, lambda: weights.read_weight_table(obj))
+    report = analysis.weight_diff(reference, current, label)
+    _object_mode_call(context, lambda: weights.write_point_attribute(mesh, DIFF_ATTRIBUTE, report.max_change))
+    mesh.update()
+    analysis.store_report(mesh, 'diff', report)
+    if report.n_changed:
+        op.report({'INFO'}, f"{report.n_changed} vert(s) changed in {len(report.groups)} group(s) "
+                            f"since {label} (see the '{DIFF_ATTRIBUTE}' attribute)")
+    else:
+        op.report({'INFO'}, f"No weight changes since {label}")
+    return {'FINISHED'}
+
+
+class WPT_OT_WeightDiff(bpy.types.Operator):
+    """Compare the active mesh's weights with another mesh or a stored weight layer"""
+    bl_idname = "wpt.weight_diff"
+    bl_label = "Weight Diff"
+    bl_description = ("List the groups and verts whose weights differ from the other selected mesh "
+                      "(same topology) or the active weight layer, and store the largest change per vertex")
+    bl_options = {'REGISTER'}
+
+    against: bpy.props.EnumProperty(
+        name="Against",
+        items=[
+            ('SELECTED', "Selected Mesh", "The other selected mesh, vertex for vertex"),
+            ('LAYER', "Weight Layer", "The active stored weight layer"),
+        ],
+        default='SELECTED',
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        obj = context.active_object
+        if self.against == 'LAYER':
+            name = context.scene.wpt_layers.active_layer
+            reference = load_layer(obj.data, name) if name else None
+            if reference is None:
+                self.report({'WARNING'}, "No weight layer to compare with")
+                return {'CANCELLED'}
+            return _show_diff(self, context, obj, reference, f"layer '{name}'")
+        others = [o for o in _selected_meshes(context) if o != obj]
+        if len(others) != 1:
+            self.report({'WARNING'}, "Select exactly one other mesh to compare with")
+            return {'CANCELLED'}
+        reference = _object_mode_call(context, lambda: weights.read_weight_table(others[0]))
+        return _show_diff(self, context, obj, reference, others[0].name)
+
+
+class WPT_OT_WeightDiffFile(bpy.types.Operator, ImportHelper):
+    """Compare the active mesh's weights with the ones saved in a weight file"""
+    bl_idname = "wpt.weight_diff_file"
+    bl_label = "Weight Diff (File)"
+    bl_description = ("List the groups and verts whose weights differ from an exported .npz weight file "
+                      "and store the largest change per vertex")
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".npz"
+    filter_glob: bpy.props.StringProperty(default="*.npz", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        obj = context.active_object
+        try:
+            archive = weight_io.WeightArchive(self.filepath)
+        except (OSError, KeyError, ValueError) as e:
+            self.report({'ERROR'}, f"Not a valid weight file: {e}")
+            return {'CANCELLED'}
+        with archive:
+            index = archive.index_of(obj.name)
+            if index is None and len(archive.object_names) == 1:
+                index = 0
+            if index is None:
+                self.report({'WARNING'}, f"{os.path.basename(self.filepath)} has no weights for {obj.name}")
+                return {'CANCELLED'}
+            reference = archive.table(index)
+            return _show_diff(self, context, obj, reference, os.path.basename(self.filepath))
+
+
+classes = (
+    WPT_OT_WeightHistoryStep,
+    WPT_OT_WeightHistoryClear,
+    WPT_OT_WeightLayerSnapshot,
+    WPT_OT_WeightLayerApply,
+    WPT_OT_WeightLayerDelete,
+    WPT_OT_ExportWeights,
+    WPT_OT_ExportSkinBuffers,
+    WPT_OT_ImportWeights,
+    WPT_OT_RemapGroups,
+    WPT_OT_WeightDiff,
+    WPT_OT_WeightDiffFile,
+)
+
+weight_history.register_history_operators(
+    WPT_OT_WeightLayerApply,
+    WPT_OT_ImportWeights,
+    WPT_OT_RemapGroups,
+)
@@ -6,7 +6,7 @@ import bpy
 import bpy.utils.previews
 import numpy as np
 
-from . import utils
+from . import analysis, ops_weights, utils, weight_history
 from .ops_pose_slider import draw_pose_blend
 
 
@@ -16,10 +16,10 @@ _icons = None
 
 # (tab_id, display_label, blender_icon, hover_description)
 _WPT_TABS = (
-    ('PAINT',   'Paint',   'BRUSH_DATA',     'Setup, brushes, weight slider, mirror weights, vertex influence inspector'),
-    ('SMOOTH',  'Smooth',  'BRUSH_BLUR',     'Smart smooth & sharpen on selected verts, plus cleanup batch ops'),
+    ('PAINT',   'Paint',   'BRUSH_DATA',     'Setup, brushes, weight slider, mirror and transfer weights, vertex influence inspector'),
+    ('SMOOTH',  'Smooth',  'BRUSH_BLUR',     'Smart smooth & sharpen on selected verts, cleanup batch ops, spike / leak checks, pose QA and influence budget'),
     ('RIG',     'Rig',     'ARMATURE_DATA',  'Bone visibility, collection presets, pose save/blend/mirror'),
-    ('TOOLS',   'Tools',   'TOOL_SETTINGS',  'Mesh symmetry (cut/mirror) and viewport display options'),
+    ('TOOLS',   'Tools',   'TOOL_SETTINGS',  'Mesh symmetry (cut/mirror), weight layers, vertex group tools and viewport display options'),
 )
 
 
@@ -259,6 +259,33 @@ def _draw_paint_tab(layout, context):
             op = row.operator('wpt.mirror_weights', text=axis)
             op.axis = axis
 
+    if obj.type == 'MESH' and context.mode in {'OBJECT', 'PAINT_WEIGHT'}:
+        tr = context.scene.wpt_transfer
+        layout.separator()
+        col = layout.column(align=True)
+        col.label(text="Transfer Weights:", icon='MOD_DATA_TRANSFER')
+        col.prop(tr, "source", text="")
+        row = col.row(align=True)
+        row.prop(tr, "max_distance", text="Max Dist")
+        row.prop(tr, "replace_all", toggle=True)
+        col.operator('wpt.transfer_weights', icon='PASTEDOWN')
+
+        col = layout.column(align=True)
+        col.label(text="LOD Chain (active = LOD0):", icon='MOD_DECIM')
+        row = col.row(align=True)
+        row.prop(tr, "clean_threshold")
+        row.prop(tr, "max_influences", text="Max")
+        row = col.row(align=True)
+        row.prop(tr, "normalize", toggle=True)
+        row.operator('wpt.propagate_lod_weights', icon='LINKED')
+
+        layout.operator('wpt.bone_distance_weights', icon='BONE_DATA')
+
+        row = layout.row(align=True)
+        row.operator('wpt.select_by_influence', icon='RESTRICT_SELECT_OFF')
+        row.operator('wpt.grow_selection', text="", icon='REMOVE').steps = -1
+        row.operator('wpt.grow_selection', text="", icon='ADD').steps = 1
+
     _draw_influence_inspector(layout, context)
 
 
@@ -276,25 +303,178 @@ def _draw_smooth_tab(layout, context):
 
     layout.label(text="Smart Smooth:", icon='BRUSH_BLUR')
     col = layout.column(align=True)
+    row = col.row(align=True)
+    row.prop(sm, "method", text="")
+    row.prop(sm, "weighting", text="")
     col.prop(sm, "iterations", slider=True)
     col.prop(sm, "strength", slider=True)
+    if sm.method == 'TAUBIN':
+        col.prop(sm, "pass_band", slider=True)
+    col.prop(sm, "levels")
+    col.prop(sm, "tolerance")
+    row = col.row(align=True)
+    row.prop(sm, "incremental", toggle=True)
+    sub = row.row(align=True)
+    sub.active = sm.incremental
+    sub.prop(sm, "active_threshold", text="")
     row = col.row(align=True)
     row.prop(sm, "selected_only", toggle=True, text="Selected")
     row.prop(sm, "normalize", toggle=True, text="Normalize")
+    if sm.normalize:
+        col.prop(sm, "normalize_mode", text="")
     col.prop(sm, "only_active_group", toggle=True, text="Active Group Only")
+    row = col.row(align=True)
+    row.prop(sm, "symmetric", toggle=True, icon='MOD_MIRROR')
+    sub = row.row(align=True)
+    sub.active = sm.symmetric
+    sub.prop(sm, "symmetry_axis", expand=True)
 
     row = col.row(align=True)
     op = row.operator("wpt.smart_smooth", text="Smooth", icon='BRUSH_BLUR')
     op.mode = 'SMOOTH'
     op = row.operator("wpt.smart_smooth", text="Sharpen", icon='SHARPCURVE')
     op.mode = 'SHARPEN'
+    col.operator("wpt.heat_fill", text="Heat Fill Selection", icon='LIGHT_SUN')
 
     layout.separator()
     layout.label(text="Cleanup:", icon='BRUSH_DATA')
     col = layout.column(align=True)
-    col.operator("object.vertex_group_normalize_all", text="Normalize All", icon='IPO_EASE_IN_OUT')
-    col.operator("object.vertex_group_limit_total", text="Limit Total", icon='MOD_DECIM')
-    col.operator("object.vertex_group_clean", text="Clean Zero", icon='TRASH')
+    op = col.operator("wpt.cleanup_weights", text="Normalize All", icon='IPO_EASE_IN_OUT')
+    op.action = 'NORMALIZE_ALL'
+    op = col.operator("wpt.cleanup_weights", text="Limit Total", icon='MOD_DECIM')
+    op.action = 'LIMIT_TOTAL'
+    op = col.operator("wpt.cleanup_weights", text="Clean Zero", icon='TRASH')
+    op.action = 'CLEAN'
+
+    _draw_spike_check(layout, context, obj)
+    _draw_leak_check(layout, context, obj)
+    _draw_pose_qa(layout, context, obj)
+    _draw_budget(layout, context, obj)
+    _draw_weight_history(layout, obj)
+
+
+def _draw_spike_check(layout, context, obj):
+    """Spike finder + the worst groups from its last run on `obj`."""
+    layout.separator()
+    layout.label(text="Spike Check:", icon='VIEWZOOM')
+    row = layout.row(align=True)
+    row.prop(context.scene.wpt_analyze, "spike_threshold")
+    row.operator("wpt.find_spikes", text="Find", icon='ZOOM_SELECTED')
+    row = layout.row(align=True)
+    row.prop(context.scene.wpt_analyze, "fix_method", text="")
+    row.operator("wpt.fix_spikes", icon='BRUSH_BLUR')
+
+    report = analysis.get_report(obj.data, 'spikes')
+    if report is None:
+        return
+    box = layout.box()
+    if not len(report.flagged):
+        box.label(text=f"No spikes above {report.threshold:.2f}", icon='CHECKMARK')
+        return
+    box.label(text=f"{len(report.flagged)} vert(s), {len(report.groups)} group(s)", icon='ERROR')
+    col = box.column(align=True)
+    for name, n_spikes, n_breaks, worst in report.groups[:6]:
+        row = col.row(align=True)
+        row.label(text=name)
+        row.label(text=f"{n_spikes} / {n_breaks}  max {worst:.2f}")
+    if len(report.groups) > 6:
+        col.label(text=f"... {len(report.groups) - 6} more")
+
+
+def _draw_leak_check(layout, context, obj):
+    """Leak finder / purge + the groups from its last run on `obj`."""
+    settings = context.scene.wpt_analyze
+    layout.separator()
+    layout.label(text="Leak Check:", icon='BONE_DATA')
+    row = layout.row(align=True)
+    row.prop(settings, "leak_distance", text="Distance")
+    row.prop(settings, "leak_normalize", text="", icon='IPO_EASE_IN_OUT', toggle=True)
+    row = layout.row(align=True)
+    row.operator("wpt.find_leaks", text="Find", icon='ZOOM_SELECTED').purge = False
+    row.operator("wpt.find_leaks", text="Purge", icon='TRASH').purge = True
+
+    report = analysis.get_report(obj.data, 'leaks')
+    if report is None:
+        return
+    box = layout.box()
+    if not len(report.flagged):
+        box.label(text="No leaks found", icon='CHECKMARK')
+        return
+    box.label(text=f"{len(report.flagged)} vert(s), {len(report.groups)} group(s)", icon='ERROR')
+    col = box.column(align=True)
+    for name, n_islands, n_verts, mass in report.groups[:6]:
+        row = col.row(align=True)
+        row.label(text=name)
+        row.label(text=f"{n_islands} isl / {n_verts} v  mass {mass:.2f}")
+    if len(report.groups) > 6:
+        col.label(text=f"... {len(report.groups) - 6} more")
+
+
+def _draw_pose_qa(layout, context, obj):
+    """Pose QA sweep + the worst poses from its last run on `obj`."""
+    layout.separator()
+    layout.label(text="Pose QA:", icon='ARMATURE_DATA')
+    row = layout.row(align=True)
+    row.prop(context.scene.wpt_analyze, "qa_batch_size")
+    row.operator("wpt.pose_qa_sweep", text="Sweep Poses", icon='PLAY')
+
+    sweep = analysis.get_report(obj.data, 'deform')
+    if sweep is None:
+        return
+    box = layout.box()
+    box.label(text="Attributes: wpt_stretch / compression / volume_loss", icon='INFO')
+    box_col = box.column(align=True)
+    for name, stretch, compression, loss in sweep.worst_poses():
+        row = box_col.row(align=True)
+        row.label(text=name)
+        row.label(text=f"+{stretch:.0%} / -{compression:.0%} / vol -{loss:.0%}")
+
+
+def _draw_budget(layout, context, obj):
+    """Influence budget analyzer + its report for `obj` (hidden once the weights change)."""
+    settings = context.scene.wpt_analyze
+    layout.separator()
+    layout.label(text="Influence Budget:", icon='MOD_DECIM')
+    row = layout.row(align=True)
+    row.prop(settings, "budget_limit")
+    row.prop(settings, "budget_bits")
+    row = layout.row(align=True)
+    row.operator("wpt.analyze_budget", text="Analyze", icon='VIEWZOOM')
+    row.operator("wpt.apply_budget", icon='CHECKMARK')
+
+    report = analysis.get_report(obj.data, 'budget', fresh=True)
+    if report is None:
+        return
+    box = layout.box()
+    col = box.column(align=True)
+    hist = report.histogram
+    counts = "  ".join(f"{i}:{int(n)}" for i, n in enumerate(hist) if i and n)
+    col.label(text=f"Influences  {counts or '-'}")
+    if report.n_over:
+        col.label(text=f"{report.n_over} vert(s) over {report.limit}, lost {report.lost_mass:.2f} "
+                       f"(worst {report.max_lost:.1%})", icon='ERROR')
+    else:
+        col.label(text=f"All verts within {report.limit} influences", icon='CHECKMARK')
+    col.label(text=f"{report.bits}-bit error: max {report.quant_max:.4f}, mean {report.quant_mean:.4f}")
+
+
+def _draw_weight_history(layout, obj):
+    """Undo / redo buttons for the weight-only history of `obj`."""
+    n_undo, n_redo, nbytes, label = weight_history.stack_info(obj.data)
+    layout.separator()
+    layout.label(text="Weight History:", icon='RECOVER_LAST')
+    row = layout.row(align=True)
+    sub = row.row(align=True)
+    sub.enabled = n_undo > 0
+    op = sub.operator("wpt.weight_history_step", text=f"Undo ({n_undo})", icon='LOOP_BACK')
+    op.redo = False
+    sub = row.row(align=True)
+    sub.enabled = n_redo > 0
+    op = sub.operator("wpt.weight_history_step", text=f"Redo ({n_redo})", icon='LOOP_FORWARDS')
+    op.redo = True
+    row.operator("wpt.weight_history_clear", text="", icon='X')
+    if label:
+        layout.label(text=f"Last: {label} · {nbytes / 1024:.0f} KB")
 
 
 def _draw_rig_tab(layout, context):
@@ -316,8 +496,11 @@ def _draw_rig_tab(layout, context):
         return
 
     row = layout.row(align=True)
-    row.operator("wpt.toggle_deform_bones", text="Deform", icon='BONE_DATA')
+    row.operator("wpt.toggle_deform_bones", text="Deform", icon='BONE_DATA').mode = 'NAMES'
     row.operator("wpt.show_all_bones", text="All", icon='GROUP_BONE')
+    row = layout.row(align=True)
+    row.operator("wpt.toggle_deform_bones", text="Influencing", icon='MOD_VERTEX_WEIGHT').mode = 'INFLUENCE'
+    row.operator("wpt.toggle_deform_bones", text="Selection", icon='RESTRICT_SELECT_OFF').mode = 'SELECTION'
 
     row = layout.row(align=True)
     if context.mode == 'POSE':
@@ -384,6 +567,11 @@ def _draw_tools_tab(layout, context):
     else:
         layout.label(text="Symmetry: select a mesh", icon='INFO')
 
+    if obj and obj.type == 'MESH':
+        _draw_weight_layers(layout, context, obj)
+        _draw_weight_diff(layout, obj)
+        _draw_group_tools(layout, context, obj)
+
     layout.separator()
     layout.label(text="Display:", icon='OVERLAY')
 
@@ -400,6 +588,91 @@ def _draw_tools_tab(layout, context):
         layout.prop(armature, 'show_in_front', text="Bones In Front")
 
 
+def _draw_weight_layers(layout, context, obj):
+    """Snapshot / swap named weight sets stored on the mesh."""
+    props = context.scene.wpt_layers
+    layout.separator()
+    col = layout.column(align=True)
+    col.label(text="Weight Layers:", icon='RENDERLAYERS')
+    row = col.row(align=True)
+    row.prop(props, "layer_name", text="")
+    row.operator("wpt.weight_layer_snapshot", text="", icon='ADD')
+    if obj.data.get(ops_weights.LAYERS_KEY):
+        row = col.row(align=True)
+        row.prop(props, "active_layer", text="")
+        row.operator("wpt.weight_layer_delete", text="", icon='X')
+        col.operator("wpt.weight_layer_apply", text="Swap In", icon='FILE_REFRESH')
+
+    row = layout.row(align=True)
+    row.operator("wpt.export_weights", text="Export", icon='EXPORT')
+    row.operator("wpt.import_weights", text="Import", icon='IMPORT')
+    layout.operator("wpt.export_skin_buffers", text="Export Skin Buffers", icon='MOD_ARMATURE')
+
+
+def _draw_weight_diff(layout, obj):
+    """Diff buttons + the groups from the last diff of `obj`."""
+    layout.separator()
+    layout.label(text="Weight Diff:", icon='ARROW_LEFTRIGHT')
+    row = layout.row(align=True)
+    row.operator("wpt.weight_diff", text="Selected").against = 'SELECTED'
+    row.operator("wpt.weight_diff", text="Layer").against = 'LAYER'
+    row.operator("wpt.weight_diff_file", text="File")
+
+    report = analysis.get_report(obj.data, 'diff')
+    if report is None:
+        return
+    box = layout.box()
+    if not report.n_changed:
+        box.label(text=f"No changes vs {report.label}", icon='CHECKMARK')
+        return
+    box.label(text=f"{report.n_changed} vert(s), {len(report.groups)} group(s) vs {report.label}", icon='INFO')
+    col = box.column(align=True)
+    for name, n_verts, worst in report.groups[:6]:
+        row = col.row(align=True)
+        row.label(text=name)
+        row.label(text=f"{n_verts} v  max {worst:.3f}")
+    if len(report.groups) > 6:
+        col.label(text=f"... {len(report.groups) - 6} more")
+    if report.added or report.removed:
+        box.label(text=f"Groups added: {len(report.added)}, removed: {len(report.removed)}")
+
+
+def _draw_group_tools(layout, context, obj):
+    """Bulk vertex-group management: remap tables and unused-group purge."""
+    props = context.scene.wpt_groups
+    layout.separator()
+    col = layout.column(align=True)
+    col.label(text="Vertex Groups:", icon='GROUP_VERTEX')
+    row = col.row(align=True)
+    row.prop_search(props, "remap_text", bpy.data, "texts", text="")
+    row.prop(props, "remap_normalize", text="", icon='NORMALIZE_FCURVES')
+    row.prop(props, "remap_remove_sources", text="", icon='TRASH')
+    col.operator("wpt.remap_groups", text="Remap Groups", icon='SORTALPHA')
+
+    row = layout.row(align=True)
+    row.prop(props, "purge_threshold")
+    row.prop(props, "purge_orphans", toggle=True)
+    row = layout.row(align=True)
+    row.operator("wpt.purge_groups", text="Find Unused", icon='ZOOM_SELECTED').purge = False
+    row.operator("wpt.purge_groups", text="Purge", icon='TRASH').purge = True
+
+    scan = analysis.get_report(obj.data, 'groups', fresh=True)
+    if scan is None:
+        return
+    box = layout.box()
+    if not scan.unused:
+        box.label(text="No unused groups", icon='CHECKMARK')
+        return
+    box.label(text=f"{len(scan.unused)} unused group(s)", icon='ERROR')
+    col = box.column(align=True)
+    for _gi, name, reason, peak in scan.unused[:6]:
+        row = col.row(align=True)
+        row.label(text=name)
+        row.label(text=reason.title() if reason != 'WEAK' else f"max {peak:.4f}")
+    if len(scan.unused) > 6:
+        col.label(text=f"... {len(scan.unused) - 6} more")
+
+
 _WPT_TAB_DISPATCH = {
     'PAINT':  _draw_paint_tab,
     'SMOOTH': _draw_smooth_tab,
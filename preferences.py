@@ -2,9 +2,18 @@
 
 import bpy
 
+from . import weight_history
 from .keymaps import register_keymaps, update_keymaps
 
 
+def update_global_undo(self, context):
+    weight_history.set_global_undo(self.use_global_undo)
+
+
+def update_history_budget(self, context):
+    weight_history.set_budget_mb(self.history_budget_mb)
+
+
 class WPT_OT_RecordKey(bpy.types.Operator):
     """Record a key press for shortcut assignment"""
     bl_idname = "wpt.record_key"
@@ -154,6 +163,20 @@ class WPT_AddonPreferences(bpy.types.AddonPreferences):
     quick_switch_mesh_ctrl: bpy.props.BoolProperty(name="Ctrl", default=False, update=update_keymaps)
     quick_switch_mesh_shift: bpy.props.BoolProperty(name="Shift", default=False, update=update_keymaps)
 
+    use_global_undo: bpy.props.BoolProperty(
+        name="Global Undo for Weight Tools",
+        description="Also push Blender's global undo step for the weight tools that record into the weight history. "
+                    "Turn off on heavy scenes and use the weight history instead",
+        default=True,
+        update=update_global_undo,
+    )
+    history_budget_mb: bpy.props.IntProperty(
+        name="Weight History Budget (MB)",
+        description="Memory shared by all meshes' weight history; the oldest steps are dropped beyond it",
+        default=weight_history.DEFAULT_BUDGET_MB, min=1, max=4096,
+        update=update_history_budget,
+    )
+
     stored_bone_collections: bpy.props.StringProperty(
         name="Stored Bone Collections",
         description="Names of stored bone collections (JSON)",
@@ -232,6 +255,12 @@ class WPT_AddonPreferences(bpy.types.AddonPreferences):
         layout.separator()
         layout.operator("wpt.refresh_keymaps", text="Refresh Keymaps", icon='FILE_REFRESH')
 
+        box = layout.box()
+        box.label(text="Weight History:", icon='RECOVER_LAST')
+        col = box.column()
+        col.prop(self, "use_global_undo")
+        col.prop(self, "history_budget_mb")
+
 
 classes = (
     WPT_OT_RecordKey,
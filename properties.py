@@ -2,7 +2,7 @@
 
 import bpy
 from bpy.props import (
-    BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty,
+    BoolProperty, EnumProperty, FloatProperty, IntProperty, PointerProperty, StringProperty,
 )
 from bpy.types import PropertyGroup
 
@@ -16,9 +16,56 @@ class WPT_SmoothSettings(PropertyGroup):
         description="How many smoothing passes to run",
         default=5, min=1, max=50,
     )
+    method: EnumProperty(
+        name="Method",
+        description="Smoothing scheme used for each pass",
+        items=[
+            ('LAPLACIAN', "Laplacian", "Plain neighbour averaging (shrinks peaks over many passes)"),
+            ('TAUBIN', "Taubin", "λ/μ shrink + inflate pair per pass — smooths without flattening weights at joints"),
+        ],
+        default='LAPLACIAN',
+    )
+    weighting: EnumProperty(
+        name="Weighting",
+        description="How neighbours are weighted when averaging",
+        items=[
+            ('UNIFORM', "Uniform", "Every neighbour counts the same (follows topology density)"),
+            ('EDGE_LENGTH', "Edge Length", "Closer neighbours count more (inverse edge length)"),
+            ('COTANGENT', "Cotangent", "Cotangent weights — even, topology-independent falloffs"),
+        ],
+        default='UNIFORM',
+    )
+    pass_band: FloatProperty(
+        name="Pass Band",
+        description="Taubin pass-band frequency (k_PB): lower keeps more of the broad weight shape",
+        default=0.1, min=0.01, max=0.5,
+    )
+    levels: IntProperty(
+        name="Coarse Levels",
+        description="Smooth on this many coarser vertex clusterings first, then refine on the full mesh "
+                    "(wide falloffs without hundreds of iterations; 0 = full resolution only)",
+        default=0, min=0, max=8,
+    )
+    tolerance: FloatProperty(
+        name="Tolerance",
+        description="Stop early once no weight changes by more than this in a pass (0 = always run every iteration)",
+        default=0.0, min=0.0, max=0.1, precision=5, step=0.01,
+    )
+    incremental: BoolProperty(
+        name="Incremental",
+        description="After each pass only recompute verts that still moved (plus their neighbours) — "
+                    "much faster on large smooths where most weights have already settled",
+        default=False,
+    )
+    active_threshold: FloatProperty(
+        name="Settle Threshold",
+        description="A vertex whose weights change less than this in a pass is treated as settled",
+        default=1e-4, min=1e-7, max=0.01, precision=6, step=0.001,
+    )
     strength: FloatProperty(
         name="Strength",
-        description="How strongly each pass blends a vertex toward its neighbour average",
+        description="How strongly each pass blends a vertex toward its neighbour average "
+                    "(Taubin uses at most 0.5, higher values would amplify noise)",
         default=0.5, min=0.0, max=1.0, subtype='FACTOR',
     )
     selected_only: BoolProperty(
@@ -31,6 +78,30 @@ class WPT_SmoothSettings(PropertyGroup):
         description="Re-normalise each affected vertex's weights to sum to 1.0",
         default=True,
     )
+    symmetric: BoolProperty(
+        name="Symmetric",
+        description="Smooth the side holding most of the selection and write the mirrored result into "
+                    "the flipped (.L/.R) groups in the same pass; verts on the mirror plane are averaged",
+        default=False,
+    )
+    symmetry_axis: EnumProperty(
+        name="Symmetry Axis",
+        items=[
+            ('X', "X", "Mirror across X"),
+            ('Y', "Y", "Mirror across Y"),
+            ('Z', "Z", "Mirror across Z"),
+        ],
+        default='X',
+    )
+    normalize_mode: EnumProperty(
+        name="Normalize Mode",
+        description="What the per-vertex total is normalised against",
+        items=[
+            ('LOCKED', "Preserve Locked", "Keep locked group weights; unlocked groups fill the rest up to 1.0"),
+            ('SMOOTHED', "Smoothed Groups", "Only the smoothed groups are summed and scaled to 1.0"),
+        ],
+        default='SMOOTHED',
+    )
     only_active_group: BoolProperty(
         name="Active Group Only",
         description="Smooth only the active vertex group instead of every unlocked group",
@@ -38,6 +109,147 @@ class WPT_SmoothSettings(PropertyGroup):
     )
 
 
+# Enum items built by a callback must stay referenced from Python, or Blender
+# ends up showing garbage strings.
+_layer_items = []
+
+
+def _weight_layer_items(self, context):
+    from .ops_weights import layer_names
+    obj = context.active_object
+    names = layer_names(obj.data) if obj and obj.type == 'MESH' else []
+    _layer_items[:] = [(name, name, "") for name in names]
+    return _layer_items
+
+
+class WPT_LayerSettings(PropertyGroup):
+    """UI state for weight layers (the layers themselves live on the mesh)."""
+    layer_name: StringProperty(
+        name="Layer Name",
+        description="Name for a new weight layer snapshot",
+        default="Layer",
+    )
+    active_layer: EnumProperty(
+        name="Layer",
+        description="Stored weight layer to apply or delete",
+        items=_weight_layer_items,
+    )
+
+
+def _is_mesh(self, obj):
+    return obj.type == 'MESH'
+
+
+class WPT_TransferSettings(PropertyGroup):
+    """Settings for transferring weights from a source mesh by surface projection."""
+    source: PointerProperty(
+        name="Source",
+        description="Mesh whose weights are projected onto the active mesh",
+        type=bpy.types.Object,
+        poll=_is_mesh,
+    )
+    max_distance: FloatProperty(
+        name="Max Distance",
+        description="Vertices farther than this from the source surface keep their weights (0 = no limit)",
+        default=0.0, min=0.0, soft_max=1.0,
+        subtype='DISTANCE',
+    )
+    replace_all: BoolProperty(
+        name="Replace All",
+        description="Clear target groups the source doesn't have instead of leaving them untouched",
+        default=True,
+    )
+    clean_threshold: FloatProperty(
+        name="Clean",
+        description="LOD propagation: drop transferred weights at or below this value",
+        default=0.01, min=0.0, max=1.0,
+    )
+    max_influences: IntProperty(
+        name="Max Influences",
+        description="LOD propagation: deform groups kept per vertex (0 = no limit)",
+        default=4, min=0, max=32,
+    )
+    normalize: BoolProperty(
+        name="Normalize",
+        description="LOD propagation: normalize deform weights to 1.0 per vertex",
+        default=True,
+    )
+
+
+class WPT_AnalyzeSettings(PropertyGroup):
+    """Settings for the weight QA checks."""
+    spike_threshold: FloatProperty(
+        name="Threshold",
+        description="Flag verts whose weight differs from their neighbours' average by more than this",
+        default=0.3, min=0.01, max=1.0,
+    )
+    fix_method: EnumProperty(
+        name="Fix Method",
+        description="How Fix Spikes replaces a spike vert's weights",
+        items=[
+            ('LAPLACIAN', "Mean", "Neighbour average"),
+            ('MEDIAN', "Median", "Per-group neighbour median; robust when bad verts sit next to each other"),
+        ],
+        default='LAPLACIAN',
+    )
+    leak_distance: FloatProperty(
+        name="Leak Distance",
+        description="Weight on verts farther than this from the group's bone counts as leaked",
+        default=0.25, min=0.0, soft_max=2.0,
+        subtype='DISTANCE',
+    )
+    leak_normalize: BoolProperty(
+        name="Renormalize",
+        description="After purging, rescale the remaining bone weights of affected verts to their previous total",
+        default=True,
+    )
+    qa_batch_size: IntProperty(
+        name="Batch",
+        description="Poses skinned per step of the pose QA sweep",
+        default=8, min=1, max=256,
+    )
+    budget_limit: IntProperty(
+        name="Influences",
+        description="Maximum deform influences per vertex the target engine supports",
+        default=4, min=1, max=16,
+    )
+    budget_bits: IntProperty(
+        name="Bits",
+        description="Bit depth of exported skin weights",
+        default=8, min=2, max=16,
+    )
+
+
+class WPT_GroupSettings(PropertyGroup):
+    """Settings for the vertex-group management tools."""
+    remap_text: PointerProperty(
+        name="Remap Table",
+        description="Text block with one 'source > target [factor]' rule per line",
+        type=bpy.types.Text,
+    )
+    remap_normalize: BoolProperty(
+        name="Normalize",
+        description="Rescale the deform weights of remapped verts to 1.0",
+        default=True,
+    )
+    remap_remove_sources: BoolProperty(
+        name="Remove Sources",
+        description="Delete the vertex groups that were mapped away",
+        default=True,
+    )
+    purge_threshold: FloatProperty(
+        name="Threshold",
+        description="Groups whose strongest weight is at or below this count as unused",
+        default=0.001, min=0.0, max=1.0,
+    )
+    purge_orphans: BoolProperty(
+        name="Non-Bone",
+        description=("Also purge weighted groups without a matching deform bone (weak or orphaned). "
+                     "Off: such groups are kept unless empty, since they may be masks or pins"),
+        default=False,
+    )
+
+
 class PoseData(PropertyGroup):
     """One saved pose entry."""
     name: StringProperty(name="Pose Name")
@@ -98,6 +310,10 @@ class BoneCollectionProperties(PropertyGroup):
 
 classes = (
     WPT_SmoothSettings,
+    WPT_LayerSettings,
+    WPT_TransferSettings,
+    WPT_AnalyzeSettings,
+    WPT_GroupSettings,
     PoseData,
     BoneCollectionPreset,
     PoseSliderProperties,
@@ -0,0 +1,146 @@
+"""Rule-driven vertex-group remapping: rename, merge, split and drop groups in one pass.
+
+A remap table is plain text, one rule per line:
+
+    DEF-upper_arm.L > upper_arm.l          rename
+    DEF-forearm_twist.L > DEF-forearm.L    merge (several sources, one target)
+    DEF-spine > spine_01, 0.5              split (one source, several targets
+    DEF-spine > spine_02, 0.5                with factors)
+    DEF-* > *_arp                          '*' carries the matched part over
+    MCH-helper >                           no target: drop the group's weights
+
+`>`, `->` and `,` all separate source and target; the optional factor
+(default 1) follows the target after whitespace or a comma. Blank lines and
+`#` comments are skipped. Exact source names win over wildcard patterns and
+the first matching pattern wins among wildcards; all lines sharing the
+winning source apply. Rules only ever see the original names, so they
+don't chain.
+
+The whole table is resolved into a sparse (groups × targets) matrix and the
+weight table is multiplied by it in one vectorised step.
+"""
+
+import re
+
+import numpy as np
+
+from .weights import CSRMatrix, WEIGHT_EPS, WeightTable
+
+_RULE = re.compile(
+    r'^(?P<source>.+?)\s*(?:->|>|,)\s*(?P<target>.*?)'
+    r'(?:\s*[,\s]\s*(?P<factor>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?))?$')
+
+
+class RemapRule:
+    """One parsed line of a remap table."""
+
+    __slots__ = ('source', 'target', 'factor', 'line')
+
+    def __init__(self, source, target, factor, line):
+        self.source = source
+        self.target = target
+        self.factor = factor
+        self.line = line
+
+
+def parse_rules(lines):
+    """RemapRules from text lines. Raises ValueError naming the first bad line."""
+    rules = []
+    for number, raw in enumerate(lines, 1):
+        line = raw.split('#', 1)[0].strip()
+        if not line:
+            continue
+        m = _RULE.match(line)
+        if m is None:
+            raise ValueError(f"Line {number}: expected 'source > target [factor]'")
+        source, target = m.group('source'), m.group('target')
+        if source.count('*') > 1 or target.count('*') > 1:
+            raise ValueError(f"Line {number}: only one '*' per name is supported")
+        if '*' in target and '*' not in source:
+            raise ValueError(f"Line {number}: '*' in the target needs one in the source")
+        factor = float(m.group('factor')) if m.group('factor') else 1.0
+        rules.append(RemapRule(source, target, factor, number))
+    return rules
+
+
+def _pattern(source):
+    head, _, tail = source.partition('*')
+    return re.compile(re.escape(head) + '(.*)' + re.escape(tail) + r'\Z')
+
+
+def resolve(rules, group_names):
+    """Rules that apply to each group name: {group index: [(target name, factor), ...]}.
+
+    A rule with an empty target contributes nothing, so its sources simply
+    vanish. Groups no rule matches are left out.
+    """
+    exact, wildcard = {}, {}
+    for rule in rules:
+        bucket = wildcard if '*' in rule.source else exact
+        bucket.setdefault(rule.source, []).append(rule)
+    patterns = [(_pattern(source), group) for source, group in wildcard.items()]
+
+    out = {}
+    for gi, name in enumerate(group_names):
+        matched = exact.get(name)
+        captured = ''
+        if matched is None:
+            for pattern, group in patterns:
+                m = pattern.match(name)
+                if m:
+                    matched, captured = group, m.group(1)
+                    break
+        if matched is None:
+            continue
+        out[gi] = [(rule.target.replace('*', captured), rule.factor) for rule in matched if rule.target]
+    return out
+
+
+def remap_table(table, mapping, normalize=False, subset=None):
+    """Apply a resolved mapping (see resolve) to `table` as one sparse product.
+
+    Unmapped groups pass through under their own name. Returns
+    (remapped WeightTable, sorted indices of the input groups that were
+    mapped). Weights are clamped to 1; with `normalize` every vertex that
+    held a mapped group is rescaled to sum to 1 over the output groups
+    named in `subset` (all groups when None).
+    """
+    names = [name for gi, name in enumerate(table.group_names) if gi not in mapping]
+    index = {name: i for i, name in enumerate(names)}
+    src, dst, factor = [], [], []
+    for gi, name in enumerate(table.group_names):
+        targets = mapping.get(gi, ((name, 1.0),))
+        for target, f in targets:
+            if target not in index:
+                index[target] = len(names)
+                names.append(target)
+            src.append(gi)
+            dst.append(index[target])
+            factor.append(f)
+    remap = CSRMatrix.from_coo(src, dst, factor, (table.n_groups, len(names)))
+
+    # (verts × groups) @ (groups × targets): expand every stored weight by its
+    # group's row of the remap matrix, then sum duplicate (vert, target) pairs.
+    starts = remap.indptr[table.groups]
+    counts = remap.indptr[table.groups + 1] - starts
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - starts, counts)
+    rows = np.repeat(table.rows(), counts)
+    product = CSRMatrix.from_coo(rows, remap.indices[offsets],
+                                 np.repeat(table.weights, counts) * remap.data[offsets],
+                                 (table.n_verts, len(names)))
+    values = np.clip(product.data, 0.0, 1.0)
+    rows = product.row_ids()
+
+    mapped = np.array(sorted(mapping), dtype=np.int32)
+    if normalize and len(mapped):
+        touched = np.zeros(table.n_verts, dtype=bool)
+        touched[table.rows()[np.isin(table.groups, mapped)]] = True
+        part = np.array([subset is None or name in subset for name in names], dtype=bool)
+        part = part[product.indices] & touched[rows]
+        total = np.bincount(rows[part], weights=values[part], minlength=table.n_verts)
+        scale = np.where(total > WEIGHT_EPS, 1.0 / np.maximum(total, WEIGHT_EPS), 1.0)
+        values = np.where(part, values * scale[rows], values)
+
+    keep = values > WEIGHT_EPS
+    return WeightTable.from_coo(rows[keep], product.indices[keep], values[keep],
+                                table.n_verts, names), mapped
@@ -0,0 +1,203 @@
+"""Standalone NumPy skinning: evaluate deformed vertex positions without the depsgraph.
+
+A Skeleton turns per-bone local (basis) transforms into skinning matrices,
+for one pose or a whole batch of poses at once. A SkinBinding holds the
+sparse vertex × bone weights padded to a fixed number of influences, so
+linear blend skinning of P poses is one gather of the (bones, P * 12)
+matrix block and one batched product per vertex. Constraints, drivers,
+B-bones and the inherit-rotation / inherit-scale options are not evaluated;
+this is a fast approximation for weight QA, not a replacement for the
+Armature modifier.
+"""
+
+import numpy as np
+
+from .weights import CSRMatrix, WEIGHT_EPS
+
+
+def _matrices(values):
+    return np.array([np.array(m, dtype=np.float64) for m in values]).reshape(-1, 4, 4)
+
+
+class Skeleton:
+    """Rest hierarchy of an armature, bones in `rig.data.bones` order."""
+
+    def __init__(self, rig):
+        bones = rig.data.bones
+        self.names = [b.name for b in bones]
+        index = {name: i for i, name in enumerate(self.names)}
+        self.parent = np.array([index[b.parent.name] if b.parent else -1 for b in bones], dtype=np.int64)
+        self.rest = _matrices(b.matrix_local for b in bones)
+        self.rest_inv = np.linalg.inv(self.rest)
+        # Rest transform of each bone relative to its parent's rest transform.
+        self.local_rest = self.rest.copy()
+        child = self.parent >= 0
+        self.local_rest[child] = self.rest_inv[self.parent[child]] @ self.rest[child]
+
+        depth = np.zeros(len(bones), dtype=np.int64)
+        for i in range(len(bones)):
+            p = self.parent[i]
+            while p >= 0:
+                depth[i] += 1
+                p = self.parent[p]
+        self.levels = [np.flatnonzero(depth == d) for d in range(int(depth.max(initial=-1)) + 1)]
+
+    def current_basis(self, rig):
+        """(bones, 4, 4) matrix_basis of the rig's current pose."""
+        pose_bones = rig.pose.bones
+        return _matrices(pose_bones[name].matrix_basis for name in self.names)
+
+    def pose_matrices(self, basis):
+        """Armature-space pose matrices for `basis` of shape (..., bones, 4, 4)."""
+        out = np.empty_like(basis)
+        for idx in self.levels:
+            local = self.local_rest[idx] @ basis[..., idx, :, :]
+            par = self.parent[idx]
+            root = par < 0
+            if root.all():
+                out[..., idx, :, :] = local
+            else:
+                out[..., idx[root], :, :] = local[..., root, :, :]
+                out[..., idx[~root], :, :] = out[..., par[~root], :, :] @ local[..., ~root, :, :]
+        return out
+
+    def skinning_matrices(self, basis, to_armature=None):
+        """Rest-to-pose deform matrices (..., bones, 4, 4) for `basis`.
+
+        With `to_armature` (mesh-object space to armature space, e.g.
+        rig.matrix_world⁻¹ @ mesh.matrix_world) they act on mesh-local
+        coordinates; otherwise on armature-space ones.
+        """
+        deform = self.pose_matrices(basis) @ self.rest_inv
+        if to_armature is not None:
+            to_armature = np.asarray(to_armature, dtype=np.float64)
+            deform = np.linalg.inv(to_armature) @ deform @ to_armature
+        return deform
+
+
+class SkinBinding:
+    """Normalised vertex × bone weights of a mesh for a given bone list.
+
+    Only groups named after a bone in `bone_names` contribute, and only bones
+    flagged in `deform` (default all), like the Armature modifier. Verts
+    without any contributing weight stay at rest.
+
+    Influences are stored padded to the largest per-vertex count as
+    (n_verts, k) `bones` / `weights` arrays (padding has weight 0), so
+    blending is a gather plus a fixed-width sum instead of a segmented one.
+    """
+
+    def __init__(self, table, bone_names, deform=None):
+        index = {name: i for i, name in enumerate(bone_names)}
+        usable = np.ones(len(bone_names), dtype=bool) if deform is None else np.asarray(deform, dtype=bool)
+        column = np.array([index.get(name, -1) for name in table.group_names] or [-1], dtype=np.int64)
+        col = column[table.groups] if len(table.groups) else np.zeros(0, dtype=np.int64)
+        keep = (col >= 0) & (table.weights > WEIGHT_EPS)
+        keep[keep] = usable[col[keep]]
+        mat = CSRMatrix.from_coo(table.rows()[keep], col[keep], table.weights[keep],
+                                 (table.n_verts, len(bone_names))).row_normalized()
+
+        counts = np.diff(mat.indptr)
+        width = max(int(counts.max(initial=0)), 1)
+        rows = mat.row_ids()
+        slot = np.arange(mat.nnz) - np.repeat(mat.indptr[:-1], counts)
+        self.bones = np.zeros((table.n_verts, width), dtype=np.int32)
+        self.weights = np.zeros((table.n_verts, width), dtype=np.float32)
+        self.bones[rows, slot] = mat.indices
+        self.weights[rows, slot] = mat.data
+        self.bound = counts > 0
+
+    @property
+    def n_verts(self):
+        return len(self.bones)
+
+
+# Upper bound on gathered float values per linear_blend batch.
+BLEND_CHUNK = 1 << 22
+
+
+def linear_blend(co, binding, deform):
+    """Linear blend skinning of rest positions `co` (n, 3).
+
+    `deform` is (bones, 4, 4) for one pose or (poses, bones, 4, 4) for a batch;
+    the result is (n, 3) or (poses, n, 3) accordingly. Poses are blended in
+    batches sized to keep the gathered matrices bounded.
+    """
+    single = deform.ndim == 3
+    if single:
+        deform = deform[None]
+    n_poses, n_bones = deform.shape[:2]
+    flat = deform[:, :, :3, :].astype(np.float32).transpose(1, 0, 2, 3).reshape(n_bones, n_poses, 12)
+    out = np.empty((n_poses, binding.n_verts, 3), dtype=np.float64)
+    step = max(1, BLEND_CHUNK // max(binding.bones.size * 12, 1))
+    for start in range(0, n_poses, step):
+        stop = min(start + step, n_poses)
+        gathered = flat[binding.bones, start:stop].reshape(binding.n_verts, binding.bones.shape[1], -1)
+        blended = (binding.weights[:, None, :] @ gathered).reshape(binding.n_verts, stop - start, 3, 4)
+        out[start:stop] = (np.einsum('npij,nj->pni', blended[..., :3], co)
+                           + blended[..., 3].transpose(1, 0, 2))
+    out[:, ~binding.bound] = co[~binding.bound]
+    return out[0] if single else out
+
+
+# ===== Dual quaternions =====
+
+def _quat_from_matrices(rot):
+    """Unit quaternions (w, x, y, z) of rotation matrices (..., 3, 3)."""
+    m = rot
+    trace = m[..., 0, 0] + m[..., 1, 1] + m[..., 2, 2]
+    cand = np.stack((
+        np.stack((1.0 + trace, m[..., 2, 1] - m[..., 1, 2], m[..., 0, 2] - m[..., 2, 0], m[..., 1, 0] - m[..., 0, 1]), -1),
+        np.stack((m[..., 2, 1] - m[..., 1, 2], 1.0 + m[..., 0, 0] - m[..., 1, 1] - m[..., 2, 2], m[..., 0, 1] + m[..., 1, 0], m[..., 0, 2] + m[..., 2, 0]), -1),
+        np.stack((m[..., 0, 2] - m[..., 2, 0], m[..., 0, 1] + m[..., 1, 0], 1.0 - m[..., 0, 0] + m[..., 1, 1] - m[..., 2, 2], m[..., 1, 2] + m[..., 2, 1]), -1),
+        np.stack((m[..., 1, 0] - m[..., 0, 1], m[..., 0, 2] + m[..., 2, 0], m[..., 1, 2] + m[..., 2, 1], 1.0 - m[..., 0, 0] - m[..., 1, 1] + m[..., 2, 2]), -1),
+    ), -2)
+    # Pick the numerically largest of the four candidate forms per matrix.
+    diag = np.stack((trace, m[..., 0, 0], m[..., 1, 1], m[..., 2, 2]), -1)
+    best = np.argmax(diag, axis=-1)
+    q = np.take_along_axis(cand, best[..., None, None], axis=-2)[..., 0, :]
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def _quat_mul(a, b):
+    aw, ax, ay, az = np.moveaxis(a, -1, 0)
+    bw, bx, by, bz = np.moveaxis(b, -1, 0)
+    return np.stack((
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ), -1)
+
+
+def dual_quaternions(deform):
+    """(bones, 8) unit dual quaternions (real, dual) of rigid deform matrices (bones, 4, 4)."""
+    rot = deform[:, :3, :3]
+    # Strip scale so the rotation is orthonormal; DQS only blends rigid motion.
+    rot = rot / np.linalg.norm(rot, axis=1, keepdims=True)
+    real = _quat_from_matrices(rot)
+    t = np.concatenate((np.zeros((len(deform), 1)), deform[:, :3, 3]), axis=1)
+    dual = 0.5 * _quat_mul(t, real)
+    return np.concatenate((real, dual), axis=1)
+
+
+def dual_quaternion_blend(co, binding, deform):
+    """Dual-quaternion skinning of rest positions `co` (n, 3) for one pose (bones, 4, 4)."""
+    dq = dual_quaternions(deform)[binding.bones]
+    # Flip each influence into the hemisphere of the vertex's strongest bone.
+    ref = np.take_along_axis(dq, np.argmax(binding.weights, axis=1)[:, None, None], axis=1)
+    sign = np.where(np.einsum('nki,nki->nk', dq[..., :4], np.broadcast_to(ref[..., :4], dq[..., :4].shape)) < 0.0,
+                    -1.0, 1.0)
+    blended = np.einsum('nk,nki->ni', binding.weights * sign, dq)
+
+    norm = np.linalg.norm(blended[:, :4], axis=1, keepdims=True)
+    blended /= np.maximum(norm, 1e-12)
+    real, dual = blended[:, :4], blended[:, 4:]
+    conj = real * np.array([1.0, -1.0, -1.0, -1.0])
+    trans = 2.0 * _quat_mul(dual, conj)[:, 1:]
+
+    w, q = real[:, :1], real[:, 1:]
+    cross = np.cross(q, co)
+    out = co + 2.0 * w * cross + 2.0 * np.cross(q, cross) + trans
+    out[~binding.bound] = co[~binding.bound]
+    return out
@@ -0,0 +1,315 @@
+"""Vectorised weight smoothing kernels used by Smart Smooth.
+
+Weights come in as a dense (n_verts, n_groups) float32 block; only the rows
+listed in `targets` are ever modified, every other row acts as a fixed
+boundary so smoothed verts blend into untouched ones.
+"""
+
+import numpy as np
+
+from .weights import CSRMatrix
+
+
+# Largest shrink factor a Taubin pass may use. A row-normalised operator's
+# Laplacian spectrum reaches k = 2 (alternating weights), where a pass scales
+# by (1 - 2λ)(1 - 2μ); past λ = 0.5 that exceeds 1 and the pair amplifies
+# high-frequency noise instead of damping it.
+TAUBIN_MAX_LAMBDA = 0.5
+
+
+def taubin_mu(lam, pass_band):
+    """Negative inflate factor for a Taubin λ/μ pair (k_PB = 1/λ + 1/μ)."""
+    return 1.0 / (pass_band - 1.0 / lam)
+
+
+def _relax(weights, op_rows, targets, factor):
+    """One explicit Laplacian step on `targets`: w += factor * (neighbour mean - w)."""
+    cur = weights[targets]
+    weights[targets] = cur + (op_rows.dot(weights) - cur) * factor
+
+
+def smooth(weights, op, targets, iterations, strength, sign=1.0,
+           method='LAPLACIAN', pass_band=0.1, tolerance=0.0, active_eps=0.0, on_step=None,
+           clip=True):
+    """Smooth (sign=1) or sharpen (sign=-1) `weights` in place.
+
+    `op` is a row-normalised neighbour operator (CSRMatrix, see
+    weights.smoothing_operator). With method='TAUBIN' every pass is a shrink
+    (λ) step followed by an inflate (μ) step, which keeps the weight mass in
+    place instead of flattening peaks; λ is capped at TAUBIN_MAX_LAMBDA so the
+    pair stays stable. Iteration stops early once the largest per-vertex
+    change in a pass drops below `tolerance` (0 disables the check).
+
+    With `active_eps` > 0 only an active set is recomputed: after each pass,
+    the verts that moved by more than `active_eps` plus their one-ring (within
+    `targets`). Settled regions drop out, so later passes cost a fraction of
+    the first. `on_step(weights)`, if given, runs after every pass (see
+    mirror_step). With `clip` off, weights are not clamped to [0, 1] between
+    passes (smooth_multires keeps coarse levels unclamped so they conserve mass).
+
+    Returns the number of passes actually run.
+    """
+    if strength <= 0.0 or not len(targets):
+        return 0
+    op_rows = op.take_rows(targets)
+    # Rows without neighbours have no mean to move toward — leave them alone.
+    has_nbrs = op_rows.row_sums() > 0.0
+    if not has_nbrs.all():
+        targets = targets[has_nbrs]
+        if not len(targets):
+            return 0
+        op_rows = op.take_rows(targets)
+    lam = strength * sign
+    mu = None
+    if method == 'TAUBIN' and sign > 0:
+        lam = min(lam, TAUBIN_MAX_LAMBDA)
+        mu = taubin_mu(lam, pass_band)
+
+    in_targets = None
+    if active_eps > 0.0:
+        in_targets = np.zeros(weights.shape[0], dtype=bool)
+        in_targets[targets] = True
+
+    active = targets
+    used = 0
+    for used in range(1, iterations + 1):
+        prev = weights[active]
+        _relax(weights, op_rows, active, lam)
+        if mu is not None:
+            _relax(weights, op_rows, active, mu)
+        cur = weights[active]
+        if clip:
+            cur = np.clip(cur, 0.0, 1.0)
+            weights[active] = cur
+        if on_step is not None:
+            on_step(weights)
+
+        change = np.abs(cur - prev).max(axis=1, initial=0.0)
+        if tolerance > 0.0 and change.max(initial=0.0) < tolerance:
+            break
+        if in_targets is not None:
+            moved = active[change > active_eps]
+            if not len(moved):
+                break
+            frontier = np.zeros(weights.shape[0], dtype=bool)
+            frontier[moved] = True
+            frontier[op.take_rows(moved).indices] = True
+            active = np.flatnonzero(frontier & in_targets)
+            op_rows = op.take_rows(active)
+    return used
+
+
+def normalize_rows(weights, targets, eps, locked_total=None):
+    """Rescale `targets` rows of `weights` to sum to 1 (rows summing to ~0 are left alone).
+
+    With `locked_total` (per target row, weight held by locked groups outside
+    the block) rows are rescaled to fill 1 - locked_total instead, so locked
+    weights stay untouched and the vertex total still comes out at 1.
+    """
+    block = weights[targets]
+    total = block.sum(axis=1)
+    room = np.ones_like(total)
+    if locked_total is not None:
+        room = np.clip(1.0 - locked_total, 0.0, 1.0).astype(total.dtype)
+    fix = (total > eps) & (np.abs(total - room) > eps)
+    block[fix] *= (room[fix] / total[fix])[:, None]
+    weights[targets] = block
+
+
+def mirror_step(src, dst, perm, center):
+    """Build an on_step callback that keeps a smoothed block symmetric.
+
+    Rows `src` are copied onto their mirror rows `dst` with group columns
+    swapped by `perm` (column of each group's flipped twin). `center` rows lie
+    on the mirror plane and are averaged with their own flipped columns.
+    """
+    def step(weights):
+        if len(center):
+            c = weights[center]
+            weights[center] = 0.5 * (c + c[:, perm])
+        if len(src):
+            weights[dst] = weights[src][:, perm]
+    return step
+
+
+def _conservative_operator(op, mass):
+    """Neighbour operator for a coarse level whose verts stand for `mass` fine verts.
+
+    Built from the neighbour pattern of `op` as I + (A - D) / (mass * s): rows
+    still sum to 1, so flat weights stay put, and because the flux between two
+    clusters is symmetric, sum(mass * w) is unchanged by every pass. `s` is
+    the largest degree / mass ratio, which keeps every row a convex blend.
+    """
+    n = op.shape[0]
+    rows = op.row_ids()
+    degree = np.diff(op.indptr).astype(np.float64)
+    scale = 1.0 / (mass * max((degree / mass).max(initial=0.0), 1e-12))
+    diag = np.arange(n)
+    return CSRMatrix.from_coo(np.concatenate((rows, diag)), np.concatenate((op.indices, diag)),
+                              np.concatenate((scale[rows], 1.0 - degree * scale)), (n, n))
+
+
+def _prolong(fine, cluster, start, new):
+    """Hand each coarse vertex's change (`start` -> `new`) down to its members in `fine`, in place.
+
+    A drop scales the members' weights and a rise scales their headroom to 1,
+    both by the coarse vertex's own ratio. With the mass-weighted mean used for
+    restriction, the members' total weight changes by exactly the coarse
+    vertex's, and no member leaves [0, 1]. Unchanged clusters are left bit-exact.
+    """
+    s, n = start[cluster], new[cluster]
+    down = np.divide(n, s, out=np.ones_like(s), where=s > 0.0)
+    up = np.divide(1.0 - n, 1.0 - s, out=np.ones_like(s), where=s < 1.0)
+    np.maximum(down, 0.0, out=down)
+    np.maximum(up, 0.0, out=up)
+    fine[:] = np.where(n < s, fine * down, np.where(n > s, 1.0 - (1.0 - fine) * up, fine))
+
+
+def smooth_multires(weights, op, hierarchy, targets, iterations, strength, **kwargs):
+    """Cascadic coarse-to-fine smoothing over a vertex clustering hierarchy.
+
+    Weights are restricted down every level of `hierarchy` (see
+    weights.vertex_hierarchy) as a mean weighted by the number of
+    full-resolution verts each cluster covers; a cluster is free only if all
+    its members are. Starting from the coarsest level each level is smoothed
+    with a mass-conserving operator (see _conservative_operator) and its change
+    is prolonged onto the next finer level (see _prolong) before that level is
+    smoothed in turn. Total weight is therefore the same at every level, as
+    with plain smooth(). A wide falloff spreads at coarse resolution, and the
+    fine passes only clean up the blocky prolongation; weights are clamped to
+    [0, 1] only by those fine passes.
+
+    Extra keyword arguments are forwarded to smooth() (`on_step` only at full
+    resolution). Returns the number of passes run on the full-resolution mesh.
+    """
+    coarse_kwargs = {k: v for k, v in kwargs.items() if k != 'on_step'}
+    coarse_kwargs['clip'] = False
+    free = np.zeros(weights.shape[0], dtype=bool)
+    free[targets] = True
+
+    # Restrict weights (mass-weighted mean) and free flags down the hierarchy.
+    levels = []
+    cur_w, cur_free = weights, free
+    cur_mass = np.ones(weights.shape[0], dtype=np.float32)
+    for cluster, coarse_op in hierarchy:
+        m = coarse_op.shape[0]
+        mass = np.bincount(cluster, weights=cur_mass, minlength=m)
+        restrict = CSRMatrix.from_coo(cluster, np.arange(len(cluster)), cur_mass / mass[cluster],
+                                      (m, len(cluster)))
+        coarse_w = restrict.dot(cur_w)
+        coarse_free = np.bincount(cluster, weights=cur_free, minlength=m) == np.bincount(cluster, minlength=m)
+        levels.append((cluster, _conservative_operator(coarse_op, mass), coarse_w, coarse_free))
+        cur_w, cur_free, cur_mass = coarse_w, coarse_free, mass
+
+    # Coarse-to-fine: smooth each level, then push its total change (including
+    # what came down from coarser levels) one level finer.
+    starts = [coarse_w.copy() for _cluster, _op, coarse_w, _free in levels]
+    for depth in range(len(levels) - 1, -1, -1):
+        cluster, coarse_op, coarse_w, coarse_free = levels[depth]
+        start = starts[depth]
+        smooth(coarse_w, coarse_op, np.flatnonzero(coarse_free), iterations, strength, **coarse_kwargs)
+        _prolong(levels[depth - 1][2] if depth else weights, cluster, start, coarse_w)
+
+    return smooth(weights, op, targets, iterations, strength, **kwargs)
+
+
+def harmonic_fill(weights, adj, unknowns, tolerance=1e-5, max_iterations=500):
+    """Solve the discrete Laplace equation for the `unknowns` rows of `weights` in place.
+
+    `adj` is a symmetric neighbour weight matrix (weights.neighbour_weights).
+    Every other row is a fixed boundary value, so the result is the steady
+    state of heat diffusion from the surrounding weights: L_uu x_u = W_ub x_b.
+    All columns are solved together by Jacobi-preconditioned block conjugate
+    gradients, starting from the current weights. Iteration stops once every
+    column's residual drops below `tolerance` relative to its right-hand side.
+
+    Returns the number of CG iterations run.
+    """
+    m = len(unknowns)
+    if not m or not weights.shape[1]:
+        return 0
+    local = np.full(weights.shape[0], -1, dtype=np.int64)
+    local[unknowns] = np.arange(m)
+    rows_op = adj.take_rows(unknowns)
+    rows = rows_op.row_ids()
+    cols = local[rows_op.indices]
+    inner = cols >= 0
+    data = rows_op.data.astype(np.float64)
+    w_uu = CSRMatrix.from_coo(rows[inner], cols[inner], data[inner], (m, m))
+    w_uu.data = w_uu.data.astype(np.float64)
+    w_ub = CSRMatrix.from_coo(rows[~inner], rows_op.indices[~inner], data[~inner], (m, weights.shape[0]))
+    w_ub.data = w_ub.data.astype(np.float64)
+    diag = np.bincount(rows, weights=data, minlength=m)
+    inv_diag = np.divide(1.0, diag, out=np.zeros_like(diag), where=diag > 0)[:, None]
+
+    def apply(x):
+        return diag[:, None] * x - w_uu.dot(x)
+
+    b = w_ub.dot(weights.astype(np.float64))
+    x = weights[unknowns].astype(np.float64)
+    r = b - apply(x)
+    z = r * inv_diag
+    p = z.copy()
+    rz = np.einsum('ij,ij->j', r, z)
+    stop = np.maximum(tolerance * np.linalg.norm(b, axis=0), 1e-12) ** 2
+    used = 0
+    for used in range(1, max_iterations + 1):
+        if (np.einsum('ij,ij->j', r, r) <= stop).all():
+            used -= 1
+            break
+        ap = apply(p)
+        pap = np.einsum('ij,ij->j', p, ap)
+        alpha = np.divide(rz, pap, out=np.zeros_like(rz), where=pap > 1e-30)
+        x += p * alpha
+        r -= ap * alpha
+        z = r * inv_diag
+        rz_new = np.einsum('ij,ij->j', r, z)
+        beta = np.divide(rz_new, rz, out=np.zeros_like(rz), where=rz > 1e-30)
+        p = z + p * beta
+        rz = rz_new
+    weights[unknowns] = np.clip(x, 0.0, 1.0)
+    return used
+
+
+def _neighbour_median(weights, op_rows):
+    """Per-row, per-column median of each row's neighbours in `op_rows`."""
+    degree = np.diff(op_rows.indptr)
+    width = int(degree.max(initial=0))
+    gathered = np.full((op_rows.shape[0], max(width, 1), weights.shape[1]), np.nan, dtype=np.float32)
+    slot = np.arange(op_rows.nnz) - np.repeat(op_rows.indptr[:-1], degree)
+    gathered[op_rows.row_ids(), slot] = weights[op_rows.indices]
+    return np.nanmedian(gathered, axis=1)
+
+
+def fix_spikes(weights, op, outliers, method='LAPLACIAN', passes=3):
+    """Repair spike rows of `weights` in place, touching only them and their one-ring.
+
+    Outlier rows are replaced by their neighbours' mean ('LAPLACIAN', `passes`
+    Jacobi sweeps so clustered spikes settle together) or per-group median
+    ('MEDIAN', robust next to other bad verts). The one-ring then gets a single
+    half-strength relax so the repair blends in. Each row keeps its original
+    total, so normalised weights stay normalised. Returns the changed rows.
+    """
+    op_rows = op.take_rows(outliers)
+    keep = np.diff(op_rows.indptr) > 0
+    outliers = outliers[keep]
+    if not len(outliers):
+        return outliers
+    op_rows = op.take_rows(outliers)
+    ring = np.setdiff1d(op_rows.indices, outliers)
+    rows = np.union1d(outliers, ring)
+    before = weights[rows].sum(axis=1)
+
+    if method == 'MEDIAN':
+        weights[outliers] = _neighbour_median(weights, op_rows)
+    else:
+        for _ in range(passes):
+            weights[outliers] = op_rows.dot(weights)
+    smooth(weights, op, ring, 1, 0.5)
+
+    block = weights[rows]
+    after = block.sum(axis=1)
+    fix = (before > 1e-6) & (after > 1e-6)
+    block[fix] *= (before[fix] / after[fix])[:, None]
+    weights[rows] = np.clip(block, 0.0, 1.0)
+    return rows
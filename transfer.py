@@ -0,0 +1,130 @@
+"""Surface-projection weight transfer between meshes.
+
+A SourceIndex is built once per source mesh (BVH over its loop triangles plus
+its sparse weight table) and can then be projected onto any number of
+targets. Only the nearest-surface queries run per vertex — mathutils' BVH
+API is per point — everything else (barycentrics, weight interpolation,
+merging) is vectorised.
+"""
+
+import numpy as np
+from mathutils.bvhtree import BVHTree
+
+from . import weights
+
+QUERY_CHUNK = 16384
+
+
+def world_coords(obj):
+    """Vertex positions of a mesh object in world space, as (n, 3) float64."""
+    co = weights.vertex_coords(obj.data).astype(np.float64)
+    mat = np.array(obj.matrix_world, dtype=np.float64)
+    return co @ mat[:3, :3].T + mat[:3, 3]
+
+
+class SourceIndex:
+    """Spatial index + sparse weights of a source mesh object, in world space."""
+
+    def __init__(self, obj):
+        self.tris = weights.loop_triangle_array(obj.data)
+        self.co = world_coords(obj)
+        self.table = weights.read_weight_table(obj)
+        self.bvh = BVHTree.FromPolygons(self.co.tolist(), self.tris.tolist(), all_triangles=True)
+
+    def project(self, points, max_distance=0.0, progress=None):
+        """Nearest source triangle for each point.
+
+        Returns (tri_index, barycentric (n, 3), hit mask). `progress(done, total)`
+        is called after every chunk of queries.
+        """
+        n = len(points)
+        tri_index = np.full(n, -1, dtype=np.int64)
+        hit_co = np.zeros((n, 3), dtype=np.float64)
+        find = self.bvh.find_nearest
+        dist = max_distance if max_distance > 0.0 else 1.0e30
+        for start in range(0, n, QUERY_CHUNK):
+            stop = min(start + QUERY_CHUNK, n)
+            for i, p in enumerate(points[start:stop].tolist(), start):
+                loc, _normal, idx, _d = find(p, dist)
+                if idx is not None:
+                    tri_index[i] = idx
+                    hit_co[i] = loc
+            if progress is not None:
+                progress(stop, n)
+        hit = tri_index >= 0
+        bary = np.zeros((n, 3), dtype=np.float64)
+        bary[hit] = barycentric(self.co[self.tris[tri_index[hit]]], hit_co[hit])
+        return tri_index, bary, hit
+
+    def interpolate(self, tri_index, bary, hit):
+        """Blend the source weights of each hit triangle's corners.
+
+        Returns a WeightTable with one row per point (rows of missed points
+        are empty) and the source's group names.
+        """
+        src = self.table
+        rows = np.flatnonzero(hit)
+        parts_row, parts_group, parts_weight = [], [], []
+        for c in range(3):
+            verts = self.tris[tri_index[rows], c]
+            starts = src.indptr[verts]
+            counts = src.indptr[verts + 1] - starts
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - starts, counts)
+            parts_row.append(np.repeat(rows, counts))
+            parts_group.append(src.groups[offsets])
+            parts_weight.append(src.weights[offsets] * np.repeat(bary[rows, c], counts))
+        return merge_triplets(np.concatenate(parts_row), np.concatenate(parts_group),
+                              np.concatenate(parts_weight), len(hit), src.group_names)
+
+
+def barycentric(tri_co, points):
+    """Barycentric coordinates of `points` (n, 3) in triangles `tri_co` (n, 3, 3), clamped to the triangle."""
+    a, b, c = tri_co[:, 0], tri_co[:, 1], tri_co[:, 2]
+    v0, v1, v2 = b - a, c - a, points - a
+    d00 = np.einsum('ij,ij->i', v0, v0)
+    d01 = np.einsum('ij,ij->i', v0, v1)
+    d11 = np.einsum('ij,ij->i', v1, v1)
+    d20 = np.einsum('ij,ij->i', v2, v0)
+    d21 = np.einsum('ij,ij->i', v2, v1)
+    denom = d00 * d11 - d01 * d01
+    safe = np.abs(denom) > 1e-20
+    v = np.where(safe, (d11 * d20 - d01 * d21) / np.where(safe, denom, 1.0), 1.0 / 3.0)
+    w = np.where(safe, (d00 * d21 - d01 * d20) / np.where(safe, denom, 1.0), 1.0 / 3.0)
+    out = np.stack((1.0 - v - w, v, w), axis=1)
+    np.clip(out, 0.0, 1.0, out=out)
+    out /= np.maximum(out.sum(axis=1, keepdims=True), 1e-12)
+    return out
+
+
+def merge_triplets(rows, groups, values, n_rows, group_names):
+    """Sum duplicate (row, group) triplets into a WeightTable."""
+    n_groups = max(len(group_names), 1)
+    keys = rows.astype(np.int64) * n_groups + groups
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    summed = np.bincount(inverse, weights=values, minlength=len(uniq))
+    return weights.WeightTable.from_coo(uniq // n_groups, uniq % n_groups, summed,
+                                        n_rows, group_names)
+
+
+def keep_missed(table, current, hit):
+    """Carry `current` weights over for the rows of `table` that weren't hit.
+
+    Group names are merged (table's first), so the result can be applied with
+    weight_history.apply_table without clearing anything on missed verts.
+    """
+    if hit.all():
+        return table
+    names = list(table.group_names)
+    index = {name: i for i, name in enumerate(names)}
+    for name in current.group_names:
+        if name not in index:
+            index[name] = len(names)
+            names.append(name)
+    remap = np.array([index[name] for name in current.group_names] or [0], dtype=np.int64)
+    cur_rows = current.rows()
+    missed = ~hit[cur_rows]
+    return weights.WeightTable.from_coo(
+        np.concatenate((table.rows(), cur_rows[missed])),
+        np.concatenate((table.groups, remap[current.groups[missed]])),
+        np.concatenate((table.weights, current.weights[missed])),
+        table.n_verts, names)
@@ -0,0 +1,243 @@
+"""Per-mesh weight-only history, independent of Blender's global undo.
+
+Each step stores just the (vertex, group, old weight, new weight) values an
+operator changed, packed into flat arrays and zlib-compressed. Groups are
+stored by name so steps survive groups being added or reordered. All stacks
+share one memory budget; the oldest steps are evicted first.
+"""
+
+import itertools
+import zlib
+
+import bpy
+import numpy as np
+
+from . import weights
+
+DEFAULT_BUDGET_MB = 128
+MAX_STEPS = 64
+
+# mesh.session_uid -> {'undo': [_Delta, ...], 'redo': [_Delta, ...]}
+# (never reused within a session, unlike the mesh's memory address).
+_stacks = {}
+_budget = [DEFAULT_BUDGET_MB * 1024 * 1024]
+_seq = itertools.count()
+
+
+class _Delta:
+    """One compressed history step."""
+
+    __slots__ = ('label', 'seq', 'n_verts', 'group_names', 'count', 'blob')
+
+    def __init__(self, label, n_verts, group_names, verts, groups, old, new):
+        self.label = label
+        self.seq = next(_seq)
+        self.n_verts = n_verts
+        self.group_names = tuple(group_names)
+        self.count = len(verts)
+        packed = b''.join((
+            np.asarray(verts, dtype=np.uint32).tobytes(),
+            np.asarray(groups, dtype=np.uint16).tobytes(),
+            np.asarray(old, dtype=np.float32).tobytes(),
+            np.asarray(new, dtype=np.float32).tobytes(),
+        ))
+        self.blob = zlib.compress(packed, 1)
+
+    @property
+    def nbytes(self):
+        return len(self.blob)
+
+    def unpack(self):
+        """Return (verts, groups, old, new) arrays."""
+        raw = zlib.decompress(self.blob)
+        n = self.count
+        verts = np.frombuffer(raw, dtype=np.uint32, count=n, offset=0)
+        groups = np.frombuffer(raw, dtype=np.uint16, count=n, offset=4 * n)
+        old = np.frombuffer(raw, dtype=np.float32, count=n, offset=6 * n)
+        new = np.frombuffer(raw, dtype=np.float32, count=n, offset=10 * n)
+        return verts, groups, old, new
+
+
+def set_budget_mb(megabytes):
+    _budget[0] = int(megabytes) * 1024 * 1024
+    _evict()
+
+
+def clear(mesh=None):
+    if mesh is None:
+        _stacks.clear()
+    else:
+        _stacks.pop(mesh.session_uid, None)
+
+
+def _stack(mesh):
+    return _stacks.setdefault(mesh.session_uid, {'undo': [], 'redo': []})
+
+
+def _evict():
+    """Drop the oldest steps across all meshes until the total fits the budget."""
+    entries = [(d.seq, d.nbytes) for st in _stacks.values() for kind in ('undo', 'redo') for d in st[kind]]
+    total = sum(e[1] for e in entries)
+    if total <= _budget[0]:
+        return
+    # Find the newest step that has to go, then filter every stack once.
+    for cutoff, nbytes in sorted(entries):
+        total -= nbytes
+        if total <= _budget[0]:
+            break
+    for st in _stacks.values():
+        for kind in ('undo', 'redo'):
+            st[kind][:] = [d for d in st[kind] if d.seq > cutoff]
+
+
+def stack_info(mesh):
+    """(undo steps, redo steps, compressed bytes) for `mesh`, plus the next undo label."""
+    st = _stacks.get(mesh.session_uid)
+    if not st:
+        return 0, 0, 0, None
+    nbytes = sum(d.nbytes for kind in ('undo', 'redo') for d in st[kind])
+    label = st['undo'][-1].label if st['undo'] else None
+    return len(st['undo']), len(st['redo']), nbytes, label
+
+
+# ===== Recording =====
+
+def record(obj, label, group_names, verts, groups, old, new):
+    """Push one step. `groups` index into `group_names`. Clears the redo stack."""
+    if not len(verts):
+        return
+    st = _stack(obj.data)
+    st['undo'].append(_Delta(label, len(obj.data.vertices), group_names, verts, groups, old, new))
+    st['redo'].clear()
+    del st['undo'][:-MAX_STEPS]
+    _evict()
+
+
+def record_block(obj, label, group_indices, verts, old, new, eps=weights.WEIGHT_EPS):
+    """Record the entries that differ between two dense (verts × groups) blocks."""
+    changed = (np.abs(new - old) > 1e-6) | ((new > eps) != (old > eps))
+    rows, cols = np.nonzero(changed)
+    names = [obj.vertex_groups[int(gi)].name for gi in group_indices]
+    record(obj, label, names, np.asarray(verts)[rows], cols, old[rows, cols], new[rows, cols])
+
+
+def diff_tables(before, after):
+    """Sparse difference of two WeightTables of the same mesh.
+
+    Returns (group_names, verts, groups, old, new) covering every
+    (vertex, group) whose weight changed, appeared or vanished.
+    """
+    names = list(after.group_names)
+    index = {name: i for i, name in enumerate(names)}
+    for name in before.group_names:
+        if name not in index:
+            index[name] = len(names)
+            names.append(name)
+    remap = np.array([index[name] for name in before.group_names] or [0], dtype=np.int64)
+
+    n_groups = max(len(names), 1)
+    key_before = before.rows().astype(np.int64) * n_groups + remap[before.groups]
+    key_after = after.rows().astype(np.int64) * n_groups + after.groups
+    keys = np.union1d(key_before, key_after)
+
+    def values(table_keys, table_weights):
+        out = np.zeros(len(keys), dtype=np.float32)
+        order = np.argsort(table_keys)
+        out[np.searchsorted(keys, table_keys[order])] = table_weights[order]
+        return out
+
+    old = values(key_before, before.weights)
+    new = values(key_after, after.weights)
+    changed = np.abs(new - old) > 1e-6
+    keys = keys[changed]
+    return names, keys // n_groups, keys % n_groups, old[changed], new[changed]
+
+
+def record_tables(obj, label, before, after):
+    names, verts, groups, old, new = diff_tables(before, after)
+    record(obj, label, names, verts, groups, old, new)
+
+
+# ===== Stepping =====
+
+def step(obj, redo=False):
+    """Undo (or redo) the latest step on `obj`. Returns its label, or None if nothing to do.
+
+    Raises ValueError if the mesh's vertex count changed since the step was recorded.
+    """
+    st = _stacks.get(obj.data.session_uid)
+    src, dst = ('redo', 'undo') if redo else ('undo', 'redo')
+    if not st or not st[src]:
+        return None
+    delta = st[src][-1]
+    if delta.n_verts != len(obj.data.vertices):
+        raise ValueError("Mesh topology changed since this step was recorded")
+
+    verts, groups, old, new = delta.unpack()
+    values = new if redo else old
+    vgroups = obj.vertex_groups
+    for gi in np.unique(groups).tolist():
+        name = delta.group_names[gi]
+        vg = vgroups.get(name) or vgroups.new(name=name)
+        hit = groups == gi
+        weights.write_group_weights(vg, verts[hit].astype(np.int64), values[hit])
+
+    st[dst].append(st[src].pop())
+    return delta.label
+
+
+def apply_table(obj, table, label, replace_all=True):
+    """Make `obj`'s weights equal `table`, writing only what differs, and record the step.
+
+    Groups are matched by name; missing ones are created. With
+    `replace_all=False` groups that `table` doesn't name are left untouched
+    instead of being cleared. Returns the number of weight values written.
+    """
+    before = weights.read_weight_table(obj)
+    if not replace_all:
+        keep_names = set(table.group_names)
+        keep = [i for i, name in enumerate(before.group_names) if name in keep_names]
+        hit = np.isin(before.groups, keep)
+        before = weights.WeightTable.from_coo(
+            before.rows()[hit], before.groups[hit], before.weights[hit],
+            before.n_verts, before.group_names)
+    names, verts, groups, old, new = diff_tables(before, table)
+    vgroups = obj.vertex_groups
+    for gi in np.unique(groups).tolist():
+        name = names[gi]
+        vg = vgroups.get(name) or vgroups.new(name=name)
+        hit = groups == gi
+        weights.write_group_weights(vg, verts[hit], new[hit])
+    record(obj, label, names, verts, groups, old, new)
+    return len(verts)
+
+
+# ===== Global undo =====
+# Operator classes that record into the history. With global undo turned off
+# in the preferences they skip Blender's (full-mesh) undo push entirely.
+HISTORY_OPERATORS = []
+
+
+def register_history_operators(*classes):
+    """Add operator classes to HISTORY_OPERATORS (each module lists its own)."""
+    for cls in classes:
+        if cls not in HISTORY_OPERATORS:
+            HISTORY_OPERATORS.append(cls)
+
+
+def set_global_undo(enabled):
+    """Add or drop 'UNDO' on the history-recording operators, re-registering live ones."""
+    for cls in HISTORY_OPERATORS:
+        options = set(cls.bl_options)
+        if enabled:
+            options.add('UNDO')
+        else:
+            options.discard('UNDO')
+        if options == set(cls.bl_options):
+            continue
+        registered = getattr(cls, 'is_registered', False)
+        if registered:
+            bpy.utils.unregister_class(cls)
+        cls.bl_options = options
+        if registered:
+            bpy.utils.register_class(cls)
@@ -0,0 +1,204 @@
+"""Compact binary weight files for My Simp: sparse .npz archives and packed skin buffers.
+
+Layout (one archive, any number of meshes):
+
+    format_version   int32[1]
+    object_names     str[n_objects]
+    o<i>_groups      str[n_groups]           group names of object i
+    o<i>_indptr      int64[n_verts + 1]      CSR row pointer (row = vertex)
+    o<i>_indices     uint16/int32[nnz]       group index per weight
+    o<i>_weights     float16/float32[nnz]
+
+Uncompressed archives are read through a memory map, so importing one mesh
+out of a large file only pages in that mesh's arrays.
+
+Packed skin buffers (.wskin, one mesh per file, little-endian) hold what a
+real-time engine uploads — fixed K influences per vertex:
+
+    magic            b"WSKN"
+    version          uint16
+    k                uint8                   influences per vertex
+    index_bytes      uint8                   1 (uint8) or 2 (uint16)
+    weight_bytes     uint8                   1 (unorm8) or 2 (unorm16)
+    pad              uint8
+    n_verts          uint32
+    n_bones          uint32
+    bone names       n_bones × (uint16 byte length + UTF-8 bytes)
+    indices          index type[n_verts × k]
+    weights          unorm[n_verts × k]       each vertex sums to exactly 2**(8*weight_bytes) - 1
+"""
+
+import io
+import mmap
+import struct
+import zipfile
+
+import numpy as np
+
+from .weights import WEIGHT_EPS, WeightTable, quantized_values
+
+FORMAT_VERSION = 1
+SKIN_MAGIC = b'WSKN'
+SKIN_VERSION = 1
+
+
+def save_weights(path, tables, object_names, precision='FLOAT16', compress=False):
+    """Write `tables` (WeightTable per object, same order as `object_names`) to `path`."""
+    arrays = {
+        'format_version': np.array([FORMAT_VERSION], dtype=np.int32),
+        'object_names': np.array(object_names, dtype=str),
+    }
+    weight_dtype = np.float16 if precision == 'FLOAT16' else np.float32
+    for i, table in enumerate(tables):
+        index_dtype = np.uint16 if table.n_groups <= 0xFFFF else np.int32
+        arrays[f'o{i}_groups'] = np.array(table.group_names, dtype=str)
+        arrays[f'o{i}_indptr'] = table.indptr.astype(np.int64)
+        arrays[f'o{i}_indices'] = table.groups.astype(index_dtype)
+        arrays[f'o{i}_weights'] = table.weights.astype(weight_dtype)
+    (np.savez_compressed if compress else np.savez)(path, **arrays)
+
+
+class WeightArchive:
+    """Read access to a weight file; arrays are loaded (or mapped) one at a time."""
+
+    def __init__(self, path):
+        """Open `path`. Raises OSError, or ValueError / KeyError for files that aren't weight archives."""
+        self._file = open(path, 'rb')
+        self._zip = None
+        self._map = None
+        try:
+            try:
+                self._zip = zipfile.ZipFile(self._file)
+            except zipfile.BadZipFile as e:
+                raise ValueError(str(e)) from e
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                pass
+            version = int(self._array('format_version')[0])
+            if version > FORMAT_VERSION:
+                raise ValueError(f"Weight file version {version} is newer than supported ({FORMAT_VERSION})")
+            self.object_names = [str(n) for n in self._array('object_names')]
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # a view is still alive; the map goes with it
+            self._map = None
+        if self._zip is not None:
+            self._zip.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _array(self, name):
+        info = self._zip.getinfo(name + '.npy')
+        if self._map is None or info.compress_type != zipfile.ZIP_STORED:
+            with self._zip.open(info) as fp:
+                return np.lib.format.read_array(fp, allow_pickle=False)
+
+        # Stored member: skip the local file header and the .npy header, then
+        # view the array data straight out of the memory map.
+        off = info.header_offset
+        name_len, extra_len = struct.unpack('<HH', self._map[off + 26:off + 30])
+        data_off = off + 30 + name_len + extra_len
+        head = io.BytesIO(self._map[data_off:data_off + min(info.file_size, 1 << 16)])
+        major, _minor = np.lib.format.read_magic(head)
+        if major == 1:
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(head)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(head)
+        return np.ndarray(shape, dtype=dtype, buffer=self._map, offset=data_off + head.tell(),
+                          order='F' if fortran else 'C')
+
+    def index_of(self, object_name):
+        try:
+            return self.object_names.index(object_name)
+        except ValueError:
+            return None
+
+    def table(self, index):
+        """WeightTable of the `index`-th object (weights promoted to float32).
+
+        Every array is copied out, so the table outlives the archive and the
+        file isn't held mapped (or, on Windows, locked) once it's closed.
+        """
+        return WeightTable(
+            np.array(self._array(f'o{index}_indptr'), dtype=np.int64),
+            self._array(f'o{index}_indices').astype(np.int32),
+            self._array(f'o{index}_weights').astype(np.float32),
+            [str(n) for n in self._array(f'o{index}_groups')],
+        )
+
+
+# ===== Packed skin buffers =====
+
+def pack_skin(table, bone_names, k=4, weight_bytes=1):
+    """Top-`k` bone indices and quantized weights per vertex.
+
+    Only groups named in `bone_names` count; their position in that list is
+    the exported bone index. Each vertex keeps its `k` strongest influences
+    (argpartition over the padded per-vertex rows), renormalized and
+    quantized so the stored weights sum to exactly the unorm maximum.
+    Verts without influences get all-zero weights.
+
+    Returns (indices (n, k), weights (n, k), n_unweighted).
+    """
+    bone_index = {name: i for i, name in enumerate(bone_names)}
+    column = np.array([bone_index.get(name, -1) for name in table.group_names] or [-1], dtype=np.int64)
+    rows = table.rows()
+    col = column[table.groups] if len(table.groups) else np.zeros(0, dtype=np.int64)
+    keep = (col >= 0) & (table.weights > WEIGHT_EPS)
+    rows, col, values = rows[keep], col[keep], table.weights[keep]
+
+    n = table.n_verts
+    counts = np.bincount(rows, minlength=n)
+    width = max(int(counts.max(initial=0)), k)
+    slot = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    padded_w = np.zeros((n, width), dtype=np.float32)
+    padded_i = np.zeros((n, width), dtype=np.int64)
+    padded_w[rows, slot] = values
+    padded_i[rows, slot] = col
+
+    if width > k:
+        top = np.argpartition(-padded_w, k - 1, axis=1)[:, :k]
+        padded_w = np.take_along_axis(padded_w, top, axis=1)
+        padded_i = np.take_along_axis(padded_i, top, axis=1)
+    order = np.argsort(-padded_w, axis=1, kind='stable')
+    top_w = np.take_along_axis(padded_w, order, axis=1)
+    top_i = np.take_along_axis(padded_i, order, axis=1)
+
+    total = top_w.sum(axis=1, keepdims=True)
+    top_w = np.divide(top_w, total, out=np.zeros_like(top_w), where=total > 0)
+    levels = (1 << (8 * weight_bytes)) - 1
+    quant = quantized_values(np.repeat(np.arange(n), k), top_w.ravel(),
+                             np.ones(n * k, dtype=bool), n, 8 * weight_bytes)
+    unorm = np.rint(quant * levels).astype(np.uint8 if weight_bytes == 1 else np.uint16).reshape(n, k)
+    top_i[top_w == 0] = 0
+    return top_i, unorm, int((counts == 0).sum())
+
+
+def save_skin_buffer(path, indices, unorm, bone_names):
+    """Write one mesh's packed indices / weights (see pack_skin) as a .wskin file."""
+    n, k = indices.shape
+    index_dtype = np.dtype('<u1') if len(bone_names) <= 256 else np.dtype('<u2')
+    weight_dtype = np.dtype('<u1') if unorm.dtype.itemsize == 1 else np.dtype('<u2')
+    with open(path, 'wb') as fp:
+        fp.write(SKIN_MAGIC)
+        fp.write(struct.pack('<HBBBBII', SKIN_VERSION, k, index_dtype.itemsize, weight_dtype.itemsize, 0,
+                             n, len(bone_names)))
+        for name in bone_names:
+            raw = name.encode('utf-8')
+            fp.write(struct.pack('<H', len(raw)))
+            fp.write(raw)
+        fp.write(indices.astype(index_dtype).tobytes())
+        fp.write(unorm.astype(weight_dtype).tobytes())
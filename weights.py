@@ -0,0 +1,604 @@
+"""Bulk vertex-group weight access, cached mesh topology and sparse helpers.
+
+Blender only exposes vertex-group weights per vertex, so every tool that works
+on weights in bulk goes through this module: one Python pass reads the whole
+weight table into flat NumPy arrays, the tools work on those arrays, and the
+write-back only touches values that actually changed.
+
+Everything here is NumPy-only — Blender does not bundle SciPy.
+"""
+
+import numpy as np
+from mathutils.kdtree import KDTree
+
+# Weights at or below this are treated as "not in the group".
+WEIGHT_EPS = 1e-5
+
+
+# ===== Sparse matrix =====
+
+class CSRMatrix:
+    """Minimal compressed-sparse-row matrix with just what the weight tools need."""
+
+    __slots__ = ('indptr', 'indices', 'data', 'shape')
+
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = shape
+
+    @classmethod
+    def from_coo(cls, rows, cols, data, shape):
+        """Build from coordinate triplets. Duplicate (row, col) entries are summed."""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        data = np.asarray(data, dtype=np.float32)
+        order = np.lexsort((cols, rows))
+        rows, cols, data = rows[order], cols[order], data[order]
+        if len(rows):
+            first = np.empty(len(rows), dtype=bool)
+            first[0] = True
+            first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+            if not first.all():
+                starts = np.flatnonzero(first)
+                data = np.add.reduceat(data, starts)
+                rows, cols = rows[starts], cols[starts]
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, cols.astype(np.int32), data, shape)
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def row_ids(self):
+        """Row index of every stored entry (the COO row array)."""
+        return np.repeat(np.arange(self.shape[0], dtype=np.int32), np.diff(self.indptr))
+
+    def row_sums(self):
+        return self.dot(np.ones(self.shape[1], dtype=np.float32))
+
+    def dot(self, x):
+        """Matrix product with a vector (n,) or a block of columns (n, k)."""
+        x = np.asarray(x)
+        out = np.zeros((self.shape[0],) + x.shape[1:], dtype=np.result_type(self.data, x))
+        if not self.nnz:
+            return out
+        vals = x[self.indices]
+        vals *= self.data.reshape((-1,) + (1,) * (x.ndim - 1))
+        nonempty = self.indptr[1:] > self.indptr[:-1]
+        out[nonempty] = np.add.reduceat(vals, self.indptr[:-1][nonempty], axis=0)
+        return out
+
+    def take_rows(self, rows):
+        """Sub-matrix made of `rows` (in the given order), keeping every column."""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        offsets = np.arange(indptr[-1]) - np.repeat(indptr[:-1] - starts, counts)
+        return CSRMatrix(indptr, self.indices[offsets], self.data[offsets], (len(rows), self.shape[1]))
+
+    def row_normalized(self):
+        """Copy with every non-empty row scaled to sum to 1."""
+        sums = self.row_sums()
+        inv = np.divide(1.0, sums, out=np.zeros_like(sums), where=sums > 0)
+        data = self.data * np.repeat(inv, np.diff(self.indptr))
+        return CSRMatrix(self.indptr, self.indices, data.astype(np.float32), self.shape)
+
+
+# ===== Cached topology =====
+# Keyed by mesh.as_pointer(); each entry is validated against a signature of
+# the edge array, so topology edits rebuild it and everything derived from it.
+
+_topology_cache = {}
+
+
+def clear_caches():
+    _topology_cache.clear()
+
+
+def edge_array(mesh):
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    return edges.reshape(-1, 2)
+
+
+def vertex_coords(mesh):
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    return co.reshape(-1, 3)
+
+
+def topology_entry(mesh):
+    """Return the cache dict for `mesh`, dropping it if the topology changed.
+
+    Callers may stash anything derived purely from topology in the dict.
+    """
+    edges = edge_array(mesh)
+    sig = (len(mesh.vertices), hash(edges.tobytes()))
+    key = mesh.as_pointer()
+    entry = _topology_cache.get(key)
+    if entry is None or entry['sig'] != sig:
+        entry = {'sig': sig, 'edges': edges}
+        _topology_cache[key] = entry
+    return entry
+
+
+def mesh_adjacency(mesh):
+    """Cached vertex adjacency of `mesh` as a CSRMatrix with unit entries."""
+    entry = topology_entry(mesh)
+    adj = entry.get('adjacency')
+    if adj is None:
+        edges = entry['edges']
+        n = len(mesh.vertices)
+        rows = np.concatenate((edges[:, 0], edges[:, 1]))
+        cols = np.concatenate((edges[:, 1], edges[:, 0]))
+        adj = CSRMatrix.from_coo(rows, cols, np.ones(len(rows), dtype=np.float32), (n, n))
+        adj.data[:] = 1.0
+        entry['adjacency'] = adj
+    return adj
+
+
+def mesh_islands(mesh):
+    """Cached connected-component label (0..n_islands-1) of every vertex.
+
+    Vectorised union-find: every pass hooks the larger root of each edge onto
+    the smaller one, then path-compresses by pointer jumping, until both ends
+    of every edge share a root.
+    """
+    entry = topology_entry(mesh)
+    labels = entry.get('islands')
+    if labels is None:
+        edges = entry['edges']
+        parent = np.arange(len(mesh.vertices), dtype=np.int64)
+        a, b = edges[:, 0], edges[:, 1]
+        while True:
+            pa, pb = parent[a], parent[b]
+            split = pa != pb
+            if not split.any():
+                break
+            np.minimum.at(parent, np.maximum(pa, pb)[split], np.minimum(pa, pb)[split])
+            while True:
+                grand = parent[parent]
+                if np.array_equal(grand, parent):
+                    break
+                parent = grand
+        _, labels = np.unique(parent, return_inverse=True)
+        entry['islands'] = labels
+    return labels
+
+
+def _edge_length_weights(co, edges):
+    length = np.linalg.norm(co[edges[:, 0]] - co[edges[:, 1]], axis=1)
+    return 1.0 / np.maximum(length, 1e-6)
+
+
+def loop_triangle_array(mesh):
+    """(n_tris, 3) int32 vertex indices of the mesh's loop triangles."""
+    if hasattr(mesh, 'calc_loop_triangles'):
+        mesh.calc_loop_triangles()
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', tris)
+    return tris.reshape(-1, 3)
+
+
+def _cotangent_weights(mesh, co):
+    """Cotangent weights over the mesh's loop triangles as (rows, cols, data)."""
+    tris = loop_triangle_array(mesh)
+
+    rows, cols, data = [], [], []
+    for c in range(3):
+        i, j, k = tris[:, c], tris[:, (c + 1) % 3], tris[:, (c + 2) % 3]
+        u = co[j] - co[i]
+        v = co[k] - co[i]
+        cross = np.linalg.norm(np.cross(u, v), axis=1)
+        cot = np.einsum('ij,ij->i', u, v) / np.maximum(cross, 1e-12)
+        rows += [j, k]
+        cols += [k, j]
+        data += [0.5 * cot, 0.5 * cot]
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+
+
+def neighbour_weights(mesh, weighting='UNIFORM'):
+    """Symmetric (unnormalised) vertex-to-neighbour weight matrix of `mesh`.
+
+    'UNIFORM' weights every neighbour equally; 'EDGE_LENGTH' uses inverse edge
+    length; 'COTANGENT' uses cotangent weights over the loop triangles (negative
+    weights from obtuse triangles are clamped so every entry stays positive).
+    Geometry-aware matrices are cached until vertex positions change.
+    """
+    if weighting == 'UNIFORM':
+        return mesh_adjacency(mesh)
+    entry = topology_entry(mesh)
+    key = ('weights', weighting)
+    co = vertex_coords(mesh)
+    co_sig = hash(co.tobytes())
+    cached = entry.get(key)
+    if cached is not None and cached[0] == co_sig:
+        return cached[1]
+
+    n = len(mesh.vertices)
+    if weighting == 'COTANGENT':
+        rows, cols, data = _cotangent_weights(mesh, co)
+    else:
+        edges = entry['edges']
+        w = _edge_length_weights(co, edges)
+        rows = np.concatenate((edges[:, 0], edges[:, 1]))
+        cols = np.concatenate((edges[:, 1], edges[:, 0]))
+        data = np.concatenate((w, w))
+    mat = CSRMatrix.from_coo(rows, cols, data, (n, n))
+    np.maximum(mat.data, 1e-6, out=mat.data)
+    entry[key] = (co_sig, mat)
+    return mat
+
+
+def smoothing_operator(mesh, weighting='UNIFORM'):
+    """Row-normalised neighbour-average operator for `mesh` (see neighbour_weights)."""
+    entry = topology_entry(mesh)
+    key = ('operator', weighting)
+    mat = neighbour_weights(mesh, weighting)
+    cached = entry.get(key)
+    if cached is not None and cached[0] is mat:
+        return cached[1]
+    op = mat.row_normalized()
+    entry[key] = (mat, op)
+    return op
+
+
+def mirror_vertex_map(mesh, axis='X', threshold=1e-4):
+    """Cached index of each vertex's mirror across `axis` (-1 where none is within `threshold`).
+
+    Verts on the mirror plane map to themselves. Rebuilt when positions change.
+    """
+    entry = topology_entry(mesh)
+    co = vertex_coords(mesh)
+    co_sig = hash(co.tobytes())
+    key = ('mirror', axis, threshold)
+    cached = entry.get(key)
+    if cached is not None and cached[0] == co_sig:
+        return cached[1]
+
+    kd = KDTree(len(co))
+    for i, p in enumerate(co.tolist()):
+        kd.insert(p, i)
+    kd.balance()
+
+    flipped = co.copy()
+    flipped[:, 'XYZ'.find(axis)] *= -1.0
+    mirror = np.full(len(co), -1, dtype=np.int64)
+    for i, p in enumerate(flipped.tolist()):
+        _co, idx, dist = kd.find(p)
+        if idx is not None and dist <= threshold:
+            mirror[i] = idx
+    entry[key] = (co_sig, mirror)
+    return mirror
+
+
+def _row_max(mat, values, empty=-1.0):
+    """Per-row maximum of values[col] over stored entries (rows with no entries get `empty`)."""
+    out = np.full(mat.shape[0], empty, dtype=np.float64)
+    if mat.nnz:
+        nonempty = mat.indptr[1:] > mat.indptr[:-1]
+        out[nonempty] = np.maximum.reduceat(values[mat.indices], mat.indptr[:-1][nonempty])
+    return out
+
+
+def coarsen(adj, seed=0):
+    """Aggregate a graph one level down via a maximal independent set.
+
+    Seeds are picked with Luby's algorithm; every other vertex joins its
+    highest-priority seed neighbour. Returns (cluster index per vertex,
+    coarse adjacency CSRMatrix).
+    """
+    n = adj.shape[0]
+    prio = np.random.default_rng(seed).random(n)
+    rows = adj.row_ids()
+    cols = adj.indices
+    state = np.zeros(n, dtype=np.int8)  # 0 undecided, 1 seed, -1 covered by a seed
+
+    while True:
+        undecided = state == 0
+        if not undecided.any():
+            break
+        nbr_max = _row_max(adj, np.where(undecided, prio, -1.0))
+        new_seed = undecided & (prio > nbr_max)
+        state[new_seed] = 1
+        covered = np.zeros(n, dtype=bool)
+        covered[cols[new_seed[rows]]] = True
+        state[covered & (state == 0)] = -1
+
+    seeds = state == 1
+    seed_rank = np.cumsum(seeds) - 1
+    cluster = np.where(seeds, seed_rank, -1)
+
+    # Non-seeds: pick the seed neighbour with the highest priority.
+    cand = seeds[cols] & ~seeds[rows]
+    c_rows, c_cols = rows[cand], cols[cand]
+    order = np.lexsort((prio[c_cols], c_rows))
+    c_rows, c_cols = c_rows[order], c_cols[order]
+    last = np.ones(len(c_rows), dtype=bool)
+    last[:-1] = c_rows[1:] != c_rows[:-1]
+    cluster[c_rows[last]] = seed_rank[c_cols[last]]
+
+    m = int(seeds.sum())
+    cr, cc = cluster[rows], cluster[cols]
+    keep = cr != cc
+    coarse = CSRMatrix.from_coo(cr[keep], cc[keep], np.ones(int(keep.sum()), dtype=np.float32), (m, m))
+    coarse.data[:] = 1.0
+    return cluster, coarse
+
+
+def vertex_hierarchy(mesh, levels):
+    """Cached clustering hierarchy of `mesh`, `levels` deep (fewer if the mesh runs out).
+
+    Returns a list of (cluster index per finer vertex, row-normalised coarse
+    neighbour operator), finest first.
+    """
+    entry = topology_entry(mesh)
+    hierarchy = entry.setdefault('hierarchy', [])
+    adj = hierarchy[-1][2] if hierarchy else mesh_adjacency(mesh)
+    while len(hierarchy) < levels and adj.shape[0] > 8:
+        cluster, coarse = coarsen(adj)
+        if coarse.shape[0] >= adj.shape[0]:
+            break
+        hierarchy.append((cluster, coarse.row_normalized(), coarse))
+        adj = coarse
+    return [(cluster, op) for cluster, op, _adj in hierarchy[:levels]]
+
+
+# ===== Selection =====
+
+def selected_vertex_indices(mesh):
+    """Sorted indices of selected verts, including verts of selected faces."""
+    n_verts = len(mesh.vertices)
+    sel = np.zeros(n_verts, dtype=bool)
+    if n_verts:
+        mesh.vertices.foreach_get('select', sel)
+
+    n_polys = len(mesh.polygons)
+    if n_polys:
+        psel = np.zeros(n_polys, dtype=bool)
+        mesh.polygons.foreach_get('select', psel)
+        if psel.any():
+            loop_total = np.empty(n_polys, dtype=np.int32)
+            mesh.polygons.foreach_get('loop_total', loop_total)
+            loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+            mesh.loops.foreach_get('vertex_index', loop_verts)
+            sel[loop_verts[np.repeat(psel, loop_total)]] = True
+
+    return np.flatnonzero(sel)
+
+
+def select_vertices(mesh, indices):
+    """Make `indices` the only selected verts (edges and faces deselected). Object mode only."""
+    select = np.zeros(len(mesh.vertices), dtype=bool)
+    select[indices] = True
+    mesh.edges.foreach_set('select', np.zeros(len(mesh.edges), dtype=bool))
+    mesh.polygons.foreach_set('select', np.zeros(len(mesh.polygons), dtype=bool))
+    mesh.vertices.foreach_set('select', select)
+    mesh.update()
+
+
+def grow_mask(adj, mask, steps):
+    """Grow (steps > 0) or shrink (steps < 0) a vertex mask along `adj`, one ring per step.
+
+    Only the frontier — verts added in the previous ring — is expanded each
+    step, so a step costs the frontier's neighbour count rather than the
+    mesh. Shrinking grows the complement.
+    """
+    if steps < 0:
+        return ~grow_mask(adj, ~mask, -steps)
+    mask = mask.copy()
+    frontier = np.flatnonzero(mask)
+    for _ in range(steps):
+        nbrs = adj.take_rows(frontier).indices
+        frontier = np.unique(nbrs[~mask[nbrs]])
+        if not len(frontier):
+            break
+        mask[frontier] = True
+    return mask
+
+
+def write_point_attribute(mesh, name, values):
+    """Store per-vertex floats as a POINT attribute, replacing one of another type."""
+    attr = mesh.attributes.get(name)
+    if attr is None or attr.domain != 'POINT' or attr.data_type != 'FLOAT':
+        if attr is not None:
+            mesh.attributes.remove(attr)
+        attr = mesh.attributes.new(name, 'FLOAT', 'POINT')
+    attr.data.foreach_set('value', np.ascontiguousarray(values, dtype=np.float32))
+
+
+# ===== Weight table =====
+
+class WeightTable:
+    """All vertex-group weights of a mesh in CSR layout (row = vertex, column = group)."""
+
+    __slots__ = ('indptr', 'groups', 'weights', 'group_names')
+
+    def __init__(self, indptr, groups, weights, group_names):
+        self.indptr = indptr
+        self.groups = groups
+        self.weights = weights
+        self.group_names = group_names
+
+    @classmethod
+    def from_coo(cls, verts, groups, weights, n_verts, group_names):
+        """Build from flat (vertex, group, weight) triplets in any order."""
+        verts = np.asarray(verts, dtype=np.int64)
+        order = np.argsort(verts, kind='stable')
+        indptr = np.zeros(n_verts + 1, dtype=np.int64)
+        np.cumsum(np.bincount(verts, minlength=n_verts), out=indptr[1:])
+        return cls(indptr,
+                   np.asarray(groups, dtype=np.int32)[order],
+                   np.asarray(weights, dtype=np.float32)[order],
+                   list(group_names))
+
+    @property
+    def n_verts(self):
+        return len(self.indptr) - 1
+
+    @property
+    def n_groups(self):
+        return len(self.group_names)
+
+    def rows(self):
+        """Vertex index of every stored weight."""
+        return np.repeat(np.arange(self.n_verts, dtype=np.int32), np.diff(self.indptr))
+
+    def dense(self, group_indices):
+        """(n_verts, len(group_indices)) float32 block of the requested groups."""
+        group_indices = np.asarray(group_indices, dtype=np.int64)
+        out = np.zeros((self.n_verts, len(group_indices)), dtype=np.float32)
+        if not len(group_indices) or not len(self.groups):
+            return out
+        lookup = np.full(max(self.n_groups, int(group_indices.max()) + 1), -1, dtype=np.int64)
+        lookup[group_indices] = np.arange(len(group_indices))
+        col = lookup[self.groups]
+        keep = col >= 0
+        out[self.rows()[keep], col[keep]] = self.weights[keep]
+        return out
+
+    def totals(self, group_indices):
+        """Per-vertex sum of the weights in `group_indices`."""
+        hit = np.isin(self.groups, np.asarray(group_indices, dtype=np.int32))
+        return np.bincount(self.rows()[hit], weights=self.weights[hit],
+                           minlength=self.n_verts).astype(np.float32)
+
+    def groups_in(self, vert_mask):
+        """Sorted indices of groups carrying weight on any vertex in `vert_mask`."""
+        hit = vert_mask[self.rows()] & (self.weights > WEIGHT_EPS)
+        return np.unique(self.groups[hit])
+
+
+def prune_table(table, min_weight=0.0, limit=0, normalize=False, subset=None):
+    """Clean, limit and normalize a WeightTable without touching Blender data.
+
+    Weights at or below `min_weight` are dropped. `limit` > 0 keeps only the
+    strongest `limit` entries per vertex and `normalize` rescales each vertex
+    to sum to 1. `subset` (bool per group, e.g. deform groups) restricts
+    limiting and normalizing to those groups; the others pass through.
+    Pure NumPy, so it is safe to run from worker threads.
+    """
+    rows = table.rows()
+    groups = table.groups
+    values = table.weights
+    keep = values > max(min_weight, WEIGHT_EPS)
+    rows, groups, values = rows[keep], groups[keep], values[keep]
+    part = np.ones(len(groups), dtype=bool) if subset is None else np.asarray(subset, dtype=bool)[groups]
+
+    if limit > 0:
+        # Rank the subset entries of each vertex by descending weight.
+        idx = np.flatnonzero(part)
+        order = idx[np.lexsort((-values[idx], rows[idx]))]
+        sorted_rows = rows[order]
+        rank = np.arange(len(order)) - np.searchsorted(sorted_rows, sorted_rows)
+        keep = np.ones(len(groups), dtype=bool)
+        keep[order[rank >= limit]] = False
+        rows, groups, values, part = rows[keep], groups[keep], values[keep], part[keep]
+
+    if normalize:
+        total = np.bincount(rows[part], weights=values[part], minlength=table.n_verts)
+        scale = np.where(total > WEIGHT_EPS, 1.0 / np.maximum(total, WEIGHT_EPS), 1.0)
+        values = np.where(part, values * scale[rows], values)
+
+    return WeightTable.from_coo(rows, groups, values, table.n_verts, table.group_names)
+
+
+def quantized_values(rows, values, part, n_verts, bits):
+    """Round `values[part]` to `bits`-bit steps, keeping every vertex's quantized total.
+
+    Largest-remainder rounding: each vertex's entries are floored to multiples
+    of 1 / (2**bits - 1) and the steps lost to flooring go back to the entries
+    with the largest remainders. Entries outside `part` are returned as-is.
+    """
+    levels = float((1 << bits) - 1)
+    out = values.astype(np.float64).copy()
+    idx = np.flatnonzero(part)
+    scaled = out[idx] * levels
+    floor = np.floor(scaled)
+    target = np.rint(np.bincount(rows[idx], weights=scaled, minlength=n_verts))
+    deficit = (target - np.bincount(rows[idx], weights=floor, minlength=n_verts)).astype(np.int64)
+    order = np.lexsort((-(scaled - floor), rows[idx]))
+    sorted_rows = rows[idx][order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_rows, sorted_rows)
+    floor[order[rank < deficit[sorted_rows]]] += 1.0
+    out[idx] = floor / levels
+    return out.astype(np.float32)
+
+
+def quantize_table(table, bits, subset=None):
+    """Copy of `table` with the weights of `subset` groups quantized (see quantized_values)."""
+    rows = table.rows()
+    part = np.ones(len(table.groups), dtype=bool) if subset is None else np.asarray(subset, dtype=bool)[table.groups]
+    values = quantized_values(rows, table.weights, part, table.n_verts, bits)
+    keep = values > 0.0
+    return WeightTable.from_coo(rows[keep], table.groups[keep], values[keep], table.n_verts, table.group_names)
+
+
+def read_weight_table(obj):
+    """Read every vertex-group weight of a mesh object in a single pass.
+
+    The object must not be in Edit mode (vertex groups are only synced to the
+    mesh outside of it).
+    """
+    counts = []
+    groups = []
+    weights = []
+    for v in obj.data.vertices:
+        vgs = v.groups
+        counts.append(len(vgs))
+        for g in vgs:
+            groups.append(g.group)
+            weights.append(g.weight)
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return WeightTable(
+        indptr,
+        np.array(groups, dtype=np.int32),
+        np.array(weights, dtype=np.float32),
+        [vg.name for vg in obj.vertex_groups],
+    )
+
+
+def write_group_weights(vgroup, indices, weights, eps=WEIGHT_EPS):
+    """Bulk-write one group: weights at or below `eps` are removed.
+
+    Verts sharing an identical weight (fully weighted areas, zeros) go through a
+    single add() call, which is where most of the win over per-vertex writes is.
+    """
+    indices = np.asarray(indices)
+    weights = np.asarray(weights, dtype=np.float32)
+    drop = weights <= eps
+    if drop.any():
+        vgroup.remove(indices[drop].tolist())
+    keep = ~drop
+    if not keep.any():
+        return
+    values, inverse = np.unique(weights[keep], return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    chunks = np.split(indices[keep][order], np.cumsum(np.bincount(inverse))[:-1])
+    for value, chunk in zip(values.tolist(), chunks):
+        vgroup.add(chunk.tolist(), value, 'REPLACE')
+
+
+def write_dense_changes(obj, group_indices, verts, old, new, eps=WEIGHT_EPS):
+    """Write back the columns of `new` that differ from `old` on rows `verts`.
+
+    `old` / `new` are (len(verts), len(group_indices)) blocks. Returns the
+    number of weight values written.
+    """
+    written = 0
+    verts = np.asarray(verts)
+    for col, gi in enumerate(group_indices):
+        o = old[:, col]
+        w = new[:, col]
+        changed = (np.abs(w - o) > 1e-6) | ((w > eps) != (o > eps))
+        if not changed.any():
+            continue
+        write_group_weights(obj.vertex_groups[int(gi)], verts[changed], w[changed], eps)
+        written += int(changed.sum())
+    return written